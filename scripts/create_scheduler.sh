@@ -25,6 +25,14 @@ REGION="${REGION:-asia-northeast3}"
 TIMEZONE="${TIMEZONE:-Asia/Seoul}"
 GCLOUD="${GCLOUD:-$HOME/google-cloud-sdk/bin/gcloud}"
 ATTEMPT_DEADLINE="${ATTEMPT_DEADLINE:-900s}"
+# 실패(비 2xx) 시 재시도 — 기본 0회 (429/503으로 거절된 실행은 다음 스케줄까지 누락).
+# 재시도는 상태 코드를 가리지 않아 500으로 끝난 잡, "같은 잡 실행 중" 429도 다시 보냄
+# → 입장 제어는 인스턴스별이라 다른 인스턴스에서 같은 잡이 동시에 돌 수 있음.
+# 멱등(upsert 등)이고 동시 실행돼도 안전한 잡만 켤 것:
+#   MAX_RETRY_ATTEMPTS=2 bash scripts/create_scheduler.sh ...
+# Scheduler는 Retry-After를 보지 않으므로 min-backoff를 RETRY_AFTER_SEC(기본 60초) 이상으로.
+MAX_RETRY_ATTEMPTS="${MAX_RETRY_ATTEMPTS:-0}"
+MIN_BACKOFF="${MIN_BACKOFF:-60s}"
 
 # OIDC 서비스 계정 (아래 중 하나 선택)
 #   App Engine 기본: ${GCP_PROJECT}@appspot.gserviceaccount.com
@@ -60,6 +68,7 @@ echo "  cron:    ${CRON} (${TIMEZONE})"
 echo "  URL:     ${FULL_URL}"
 echo "  body:    ${BODY}"
 echo "  deadline: ${ATTEMPT_DEADLINE}"
+echo "  retry:   ${MAX_RETRY_ATTEMPTS}회 (min-backoff ${MIN_BACKOFF})"
 echo ""
 
 SCHEDULER_ARGS=(
@@ -74,6 +83,8 @@ SCHEDULER_ARGS=(
   --oidc-service-account-email="${SA_EMAIL}"
   --oidc-token-audience="${SERVICE_URL}"
   --attempt-deadline="${ATTEMPT_DEADLINE}"
+  --max-retry-attempts="${MAX_RETRY_ATTEMPTS}"
+  --min-backoff="${MIN_BACKOFF}"
 )
 
 # create 시도 → 이미 존재하면 update
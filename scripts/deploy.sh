@@ -23,6 +23,27 @@ CPU="2"
 TIMEOUT="900"
 MIN_INSTANCES="1"
 MAX_INSTANCES="${MAX_INSTANCES:-5}"
+# 인스턴스당 동시 잡 수 — batch_endpoint.py의 admit() 한도로 그대로 전달 (MAX_CONCURRENT_JOBS)
+MAX_CONCURRENT_JOBS="${MAX_CONCURRENT_JOBS:-4}"
+# 인스턴스당 동시 요청 수 = 잡 한도 + 1 (/health 등 여유분, gunicorn --threads 8 이하).
+# 잡 한도보다 크게 잡으면 Cloud Run이 포화된 인스턴스로 계속 보내고 스케일 아웃하지 않음.
+# 컨테이너가 돌려준 429/503은 다른 인스턴스로 재전송되지 않음 → 재시도는
+# Scheduler 잡의 --max-retry-attempts/--min-backoff (create_scheduler.sh)에 달림.
+CONCURRENCY="${CONCURRENCY:-$((MAX_CONCURRENT_JOBS + 1))}"
+
+# startup probe: gunicorn은 워커가 앱을 import(warm-up)하기 전에 포트를 열기 때문에
+# 기본 TCP probe로는 warm-up 전에 트래픽이 들어옴 → GET /health가 200일 때만 준비 완료.
+# (WARMUP_ON_START=false여도 첫 probe가 warm-up을 실행)
+STARTUP_PROBE="${STARTUP_PROBE:-httpGet.path=/health,timeoutSeconds=10,periodSeconds=5,failureThreshold=24}"
+
+# 실행 이력 저장소 (run_history_helper.py) — 인스턴스 재시작 후에도 남도록 BigQuery 사용
+# 데이터셋은 미리 생성: bq mk --dataset ${GCP_PROJECT}:${RUN_HISTORY_DATASET}
+RUN_HISTORY_BACKEND="${RUN_HISTORY_BACKEND:-bigquery}"
+RUN_HISTORY_DATASET="${RUN_HISTORY_DATASET:-batch_ops}"
+
+# 앱 환경 변수 (--update-env-vars: 기존에 설정한 다른 변수는 유지)
+ENV_VARS="GOOGLE_CLOUD_PROJECT=${GCP_PROJECT},MAX_CONCURRENT_JOBS=${MAX_CONCURRENT_JOBS}"
+ENV_VARS+=",RUN_HISTORY_BACKEND=${RUN_HISTORY_BACKEND},RUN_HISTORY_DATASET=${RUN_HISTORY_DATASET}"
 
 # ── 빌드 대상 디렉토리 (Dockerfile이 있는 곳) ──────────
 BUILD_DIR="${BUILD_DIR:-.}"
@@ -53,6 +74,9 @@ $GCLOUD run deploy "${SERVICE_NAME}" \
   --timeout="${TIMEOUT}" \
   --min-instances="${MIN_INSTANCES}" \
   --max-instances="${MAX_INSTANCES}" \
+  --concurrency="${CONCURRENCY}" \
+  --update-env-vars="${ENV_VARS}" \
+  --startup-probe="${STARTUP_PROBE}" \
   --no-allow-unauthenticated \
   --quiet
 
@@ -13,12 +13,17 @@ Google Cloud Scheduler에서 HTTP POST로 호출하는 Flask 서버.
   curl -X POST http://localhost:8080/run-my-job
 """
 
+import time
+_STARTED_AT = time.time()  # 콜드 스타트 측정 기준점 (다른 import보다 먼저)
+
 import os
 import sys
 import asyncio
+import functools
+import threading
 import traceback
 from datetime import datetime, timezone
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, after_this_request
 import logging
 
 # ── 경로 설정 (필요 시 하위 모듈 경로 추가) ──────────────
@@ -27,6 +32,16 @@ import logging
 # ── 환경 변수 기본값 ──────────────────────────────────────
 os.environ.setdefault('GOOGLE_CLOUD_PROJECT', 'your-project-id')
 
+# ── 동시 실행 제한 (admission control) ───────────────────
+# 한 인스턴스에 잡이 몰리면 스레드/메모리가 고갈되어 전부 실패하므로,
+# 한도를 넘는 요청은 빠르게 429/503 + Retry-After로 거절 (재시도는 멱등 잡만 Scheduler 재시도로 켬).
+# Cloud Run --concurrency는 MAX_CONCURRENT_JOBS + 1로 맞춰 포화 전에 스케일 아웃 (scripts/deploy.sh).
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '4'))     # 인스턴스 전체 동시 잡 수
+MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', '1536'))        # 2Gi 중 잡에 쓸 메모리
+ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '4'))   # 대기 가능한 요청 수
+ADMISSION_WAIT_SEC = float(os.getenv('ADMISSION_WAIT_SEC', '10'))    # 대기 최대 시간
+RETRY_AFTER_SEC = int(os.getenv('RETRY_AFTER_SEC', '60'))
+
 # ── 로깅 ──────────────────────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -59,6 +74,236 @@ def build_response(status, result=None, error=None, **kwargs):
     return resp
 
 
+def init_process_pool():
+    """
+    CPU 바운드 변환용 프로세스 풀 생성 (앱 시작 시 1번).
+    PROCESS_POOL_WORKERS: 'auto'(기본, 할당 CPU 수) / 숫자 / '0'(비활성)
+    잡 코드에서는 process_pool_helper.map_chunks 등으로 사용.
+    """
+    setting = os.getenv('PROCESS_POOL_WORKERS', 'auto').lower()
+    if setting == '0':
+        logger.info("프로세스 풀 비활성 (PROCESS_POOL_WORKERS=0)")
+        return
+    try:
+        from process_pool_helper import init_process_pool as _init_pool
+        t0 = time.perf_counter()
+        _init_pool(None if setting == 'auto' else int(setting))
+        _record_startup_step('process_pool', time.perf_counter() - t0)
+    except ImportError:
+        logger.warning("process_pool_helper.py 없음 — 프로세스 풀 생략")
+    except Exception as e:
+        logger.error("프로세스 풀 생성 실패: %s", e)
+
+
+def init_warmup():
+    """
+    콜드 스타트 warm-up (앱 시작 시 1번, 트래픽을 받기 전).
+    라우트 안에서 lazy import하는 무거운 모듈/클라이언트를 여기 등록해두면
+    첫 Scheduler 요청이 import·인증·클라이언트 생성 비용을 치르지 않음.
+    WARMUP_ON_START=false면 첫 GET /health 때 실행 (scripts/deploy.sh가 startup probe로 지정).
+    """
+    try:
+        from warmup_helper import mark_process_start, register_module, register_client
+    except ImportError:
+        logger.warning("warmup_helper.py 없음 — warm-up 생략")
+        return
+
+    mark_process_start(_STARTED_AT)
+    register_module('google.cloud.bigquery')
+    register_module('google.cloud.secretmanager')
+    register_module('requests')
+    # 잡 모듈도 등록 (라우트의 lazy import가 sys.modules에서 바로 반환됨)
+    # register_module('scripts.batch.my_job')
+    register_client('bigquery', _make_bigquery_client)
+
+    if os.getenv('WARMUP_ON_START', 'true').lower() == 'true':
+        ensure_warm()
+
+
+def _record_startup_step(name, seconds):
+    """warm-up 외 시작 단계 시간을 GET /startup 리포트에 기록."""
+    try:
+        from warmup_helper import record_startup_step
+        record_startup_step(name, seconds * 1000)
+    except ImportError:
+        pass
+
+
+def _make_bigquery_client():
+    from bigquery_helper import get_client
+    return get_client(os.environ['GOOGLE_CLOUD_PROJECT'])
+
+
+def ensure_warm():
+    """warm-up 실행 (이미 끝났으면 즉시 반환). 리포트 dict 또는 None."""
+    try:
+        from warmup_helper import warm_up
+        return warm_up()
+    except ImportError:
+        return None
+
+
+def get_pool_status():
+    """헬스 체크용 프로세스 풀 상태."""
+    try:
+        from process_pool_helper import pool_status
+        return pool_status()
+    except ImportError:
+        return {'enabled': False, 'workers': 0}
+
+
+class JobAdmission:
+    """
+    라우트별 / 전체 동시 실행 수 + 메모리 가중치 기반 입장 제어.
+    자리가 없으면 bounded 대기열에서 ADMISSION_WAIT_SEC까지 기다린 뒤 거절.
+    """
+
+    def __init__(self, max_concurrent, memory_budget_mb, queue_size, wait_sec):
+        self.max_concurrent = max_concurrent
+        self.memory_budget_mb = memory_budget_mb
+        self.queue_size = queue_size
+        self.wait_sec = wait_sec
+        self.running = {}       # route → 실행 중 수
+        self.memory_mb = 0      # 실행 중 잡의 예상 메모리 합
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, route, route_limit, weight_mb):
+        """
+        입장 시도. 성공 시 None, 거절 시 (HTTP 상태 코드, 사유).
+        429: 같은 라우트가 이미 한도만큼 실행 중 (잡 자체가 밀림)
+        503: 인스턴스 전체가 포화 (다른 인스턴스로 가야 함)
+        """
+        deadline = time.time() + self.wait_sec
+        with self._cond:
+            if not self._fits(route, route_limit, weight_mb) and self.waiting >= self.queue_size:
+                if self.running.get(route, 0) >= route_limit:
+                    return self._reject(429, f"{route} 동시 실행 한도({route_limit}) 초과, 대기열 가득 참")
+                return self._reject(503, "대기열 가득 참")
+
+            self.waiting += 1
+            try:
+                while not self._fits(route, route_limit, weight_mb):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        if self.running.get(route, 0) >= route_limit:
+                            return self._reject(429, f"{route} 동시 실행 한도({route_limit}) 초과")
+                        return self._reject(503, "인스턴스 동시 실행/메모리 한도 초과")
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.running[route] = self.running.get(route, 0) + 1
+            self.memory_mb += weight_mb
+            return None
+
+    def release(self, route, weight_mb):
+        with self._cond:
+            self.running[route] -= 1
+            self.memory_mb -= weight_mb
+            self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            return {
+                'running': {r: n for r, n in self.running.items() if n},
+                'memory_mb': self.memory_mb,
+                'memory_budget_mb': self.memory_budget_mb,
+                'waiting': self.waiting,
+                'rejected': self.rejected,
+            }
+
+    def _fits(self, route, route_limit, weight_mb):
+        total = sum(self.running.values())
+        if self.running.get(route, 0) >= route_limit or total >= self.max_concurrent:
+            return False
+        # 예산보다 큰 잡도 단독으로는 실행 가능하게
+        return total == 0 or self.memory_mb + weight_mb <= self.memory_budget_mb
+
+    def _reject(self, status, reason):
+        self.rejected += 1
+        return status, reason
+
+
+admission = JobAdmission(
+    MAX_CONCURRENT_JOBS, MEMORY_BUDGET_MB, ADMISSION_QUEUE_SIZE, ADMISSION_WAIT_SEC,
+)
+
+
+def admit(max_concurrent=1, memory_mb=256):
+    """
+    잡 라우트용 입장 제어 데코레이터. @app.route 바로 아래에 붙임.
+
+    Args:
+        max_concurrent: 이 라우트의 동시 실행 한도 (기본 1 — 같은 잡 중복 실행 방지)
+        memory_mb: 이 잡의 예상 최대 메모리 (MEMORY_BUDGET_MB 안에서 배분)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            route = request.path
+            rejected = admission.acquire(route, max_concurrent, memory_mb)
+            if rejected is not None:
+                status, reason = rejected
+                logger.warning("요청 거절 (%d): %s", status, reason)
+                resp = jsonify(build_response('rejected', error=reason))
+                return resp, status, {'Retry-After': str(RETRY_AFTER_SEC)}
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission.release(route, memory_mb)
+        return wrapper
+    return decorator
+
+
+def track_run(view):
+    """
+    잡 라우트 실행 이력 기록 데코레이터. @admit 아래에 붙임 (거절된 요청은 기록 안 함).
+    소요 시간, 처리 건수, 외부 호출 수/바이트, 단계별 시간을 run_history_helper 저장소에 기록.
+    저장(기준선 조회 + insert)은 응답 후처리 단계에서 실행 → @admit 슬롯을 잡고 있지 않음.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            from run_history_helper import start_run, end_run
+        except ImportError:
+            return view(*args, **kwargs)
+
+        metrics, token = start_run(request.path)
+        status, result = 'error', None
+        try:
+            # dict/str/tuple 등 Flask가 허용하는 반환값을 Response로 통일
+            resp = app.make_response(view(*args, **kwargs))
+            body = resp.get_json(silent=True)
+            body = body if isinstance(body, dict) else {}
+            status = body.get('status') or ('success' if resp.status_code < 400 else 'error')
+            result = body.get('result') if isinstance(body.get('result'), dict) else None
+            return resp
+        finally:
+            end_run(token)
+            _save_run_after_request(metrics, status, result)
+    return wrapper
+
+
+def _save_run_after_request(metrics, status, result):
+    """실행 이력 레코드를 만들고 저장은 after_this_request로 미룸. 실패는 로그만 (잡 응답에 영향 없음)."""
+    try:
+        from run_history_helper import build_record, save_run
+
+        record = build_record(metrics, status, result)
+
+        @after_this_request
+        def save(response):
+            try:
+                save_run(record)
+            except Exception as e:
+                logger.error("실행 이력 저장 실패 (%s): %s", metrics.route, e)
+            return response
+    except Exception as e:
+        logger.error("실행 이력 기록 실패 (%s): %s", metrics.route, e)
+
+
 def run_async(coro):
     """비동기 코루틴을 동기적으로 실행."""
     loop = asyncio.new_event_loop()
@@ -73,13 +318,52 @@ def run_async(coro):
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify(build_response('healthy'))
+    warmup = ensure_warm() or {}
+    return jsonify(build_response(
+        'healthy',
+        warm=warmup.get('warm', False),
+        process_pool=get_pool_status(),
+        admission=admission.status(),
+    ))
+
+
+@app.route('/startup', methods=['GET'])
+def startup():
+    """콜드 스타트 리포트 (모듈/클라이언트별 warm-up ms, 예산 초과 항목)."""
+    try:
+        from warmup_helper import startup_report
+        return jsonify(build_response('healthy', startup=startup_report()))
+    except ImportError:
+        return jsonify(build_response('healthy', startup=None))
+
+
+@app.route('/runs', methods=['GET'])
+def runs():
+    """
+    라우트별 실행 이력 요약 (p50/p95, 기준선 대비 느린 실행).
+    쿼리: route=/run-my-job (선택), limit=500
+    """
+    try:
+        from run_history_helper import get_store, summarize
+
+        route = request.args.get('route')
+        limit = request.args.get('limit', '500')
+        if not limit.isdigit() or not 1 <= int(limit) <= 10000:
+            return jsonify(build_response('error', error='limit은 1~10000 사이 정수')), 400
+        history = get_store().recent(route=route, limit=int(limit))
+        return jsonify(build_response('success', result=summarize(history)))
+    except Exception as e:
+        logger.error("실행 이력 조회 실패: %s", e)
+        traceback.print_exc()
+        return jsonify(build_response('error', error=e)), 500
 
 
 @app.route('/', methods=['GET'])
 def index():
     return jsonify(build_response('healthy', endpoints=[
         'GET  /health',
+        'GET  /startup',
+        'GET  /runs',
         # 여기에 엔드포인트 추가
         # 'POST /run-my-job',
     ]))
@@ -89,6 +373,8 @@ def index():
 
 # --- 예시: async 클래스 기반 ---
 # @app.route('/run-my-async-job', methods=['POST'])
+# @admit(max_concurrent=1, memory_mb=512)   # 동시 1개, 예상 메모리 512MB
+# @track_run                                # 실행 이력 기록 (GET /runs)
 # def run_my_async_job():
 #     try:
 #         logger.info("=== My Async Job 시작 ===")
@@ -107,6 +393,8 @@ def index():
 
 # --- 예시: sync 함수 기반 ---
 # @app.route('/run-my-sync-job', methods=['POST'])
+# @admit(max_concurrent=2, memory_mb=256)
+# @track_run
 # def run_my_sync_job():
 #     try:
 #         logger.info("=== My Sync Job 시작 ===")
@@ -123,6 +411,16 @@ def index():
 #         return jsonify(build_response('error', error=e)), 500
 
 
+# ── 시작 시 초기화 ───────────────────────────────────────
+# gunicorn 워커가 이 모듈을 import할 때 1번 실행됨.
+# `python batch_endpoint.py`로 실행하면 forkserver와 풀 워커가 이 파일을 '__mp_main__'으로
+# 다시 import하므로, 그때는 풀 생성/warm-up(BigQuery 클라이언트 생성)을 건너뜀.
+
+if __name__ != '__mp_main__':
+    init_process_pool()
+    init_warmup()
+
+
 # ── 서버 시작 ────────────────────────────────────────────
 
 if __name__ == '__main__':
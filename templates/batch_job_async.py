@@ -60,6 +60,16 @@ class MyAsyncJob:
             #     except Exception as e:
             #         log.error("항목 처리 실패: %s", e)
             #         errors += 1
+            #
+            # 예시 (스트리밍 — 수집/가공/적재를 겹쳐서 실행, pipeline_helper.py):
+            # from pipeline_helper import Pipeline, BigQuerySink
+            # pipe = Pipeline("my_async_job", queue_size=100)
+            # pipe.stage("fetch", self._fetch_page, workers=4, fan_out=True)
+            # pipe.stage("transform", self._to_row)
+            # pipe.sink("load", BigQuerySink(PROJECT, DATASET, TABLE, dry_run=dry_run),
+            #           batch_size=500)
+            # summary = await pipe.run_async(range(1, 51))
+            # processed, errors = summary["processed"], summary["errors"]
             # ──────────────────────────────────────────
             pass
 
@@ -82,9 +92,21 @@ class MyAsyncJob:
     async def _fetch_data(self) -> list:
         """데이터 조회 (BigQuery, API 등)."""
         # import aiohttp
-        # async with aiohttp.ClientSession() as session:
-        #     async with session.get("https://api.example.com/data") as resp:
+        # from retry_helper import RateLimited, RetryBudget, call_with_retry_async, parse_retry_after
+        #
+        # url = "https://api.example.com/data"
+        # budget = RetryBudget()  # 잡 실행마다 새로 생성
+        #
+        # async def get_json():
+        #     async with session.get(url) as resp:
+        #         if resp.status == 429:
+        #             raise RateLimited(parse_retry_after(resp.headers.get("Retry-After")))
+        #         resp.raise_for_status()  # 5xx만 호스트 장애로 기록 (retry_helper.is_host_failure)
         #         return await resp.json()
+        #
+        # async with aiohttp.ClientSession() as session:
+        #     # 호스트 서킷이 열려 있으면 CircuitOpenError로 즉시 실패
+        #     return await call_with_retry_async(url, get_json, budget=budget)
         return []
 
     async def _process_item(self, item: dict, dry_run: bool = False) -> None:
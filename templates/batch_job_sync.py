@@ -24,7 +24,8 @@ log = logging.getLogger(__name__)
 # ── 설정 ─────────────────────────────────────────────────
 
 MAX_RETRIES = 3
-RETRY_BACKOFF = 2  # 지수 백오프 기본값 (초)
+RETRY_BACKOFF = 2       # 백오프 최소값 (초)
+RETRY_BACKOFF_CAP = 30  # 백오프 최대값 (초)
 
 
 # ── 메인 함수 ────────────────────────────────────────────
@@ -51,10 +52,27 @@ def run_job(dry_run: bool = False, **kwargs) -> dict:
         # 여기에 비즈니스 로직 작성
         #
         # 예시:
-        # data = fetch_with_retry("https://api.example.com/data")
+        # budget = RetryBudget()  # from retry_helper import RetryBudget
+        # data = fetch_with_retry("https://api.example.com/data", budget=budget)
+        # rates = fetch_with_retry("https://api.example.com/rates", use_cache=True)
+        # (같은 URL 재호출 시 ETag/Last-Modified로 재검증 — http_cache_helper.get_cache().stats())
         # for item in data:
         #     process_item(item, dry_run=dry_run)
         #     processed += 1
+        #
+        # 예시 (스트리밍 — 수집/가공/적재를 겹쳐서 실행, pipeline_helper.py):
+        # from pipeline_helper import Pipeline, BigQuerySink
+        # pipe = Pipeline("run_job", queue_size=100)
+        # pipe.stage("fetch", lambda page: fetch_with_retry(f"{URL}?page={page}")["items"],
+        #            workers=4, fan_out=True)
+        # pipe.sink("load", BigQuerySink(PROJECT, DATASET, TABLE, dry_run=dry_run),
+        #           batch_size=500)
+        # summary = pipe.run(range(1, 51))
+        # processed, errors = summary["processed"], summary["errors"]
+        #
+        # 예시 (CPU 바운드 변환 — 프로세스 풀 오프로드, process_pool_helper.py):
+        # from process_pool_helper import map_chunks
+        # rows = map_chunks(parse_records, raw_records, chunk_size=5000, flatten=True)
         # ──────────────────────────────────────────
         pass
 
@@ -75,52 +93,84 @@ def run_job(dry_run: bool = False, **kwargs) -> dict:
 
 # ── 재시도 헬퍼 ──────────────────────────────────────────
 
-def fetch_with_retry(url: str, method: str = "GET", **kwargs) -> dict:
+def fetch_with_retry(
+    url: str,
+    method: str = "GET",
+    budget=None,
+    use_cache: bool = False,
+    **kwargs,
+) -> dict:
     """
-    HTTP 요청 + 재시도 (3회, 지수 백오프).
+    HTTP 요청 + 재시도 (3회, decorrelated jitter 백오프).
+    retry_helper.call_with_retry(호스트별 서킷 브레이커 + 재시도 예산)로 실행하므로
+    죽은 API는 빠르게 실패하고, 429는 Retry-After + jitter만큼 기다린 뒤 재시도.
+    use_cache=True면 GET 요청이 HTTP 캐시(http_cache_helper)를 거쳐 ETag/Last-Modified
+    조건부 요청으로 바뀌지 않은 응답의 다운로드와 JSON 파싱을 생략 (같은 엔드포인트 폴링용).
 
     Args:
         url: 요청 URL
         method: HTTP 메서드 (GET, POST 등)
+        budget: 잡 단위 재시도 예산 (retry_helper.RetryBudget, None이면 무제한)
+        use_cache: True면 HTTP 캐시 사용 (GET만 해당, auth/cookies 인자가 있으면 무시)
         **kwargs: requests 추가 인자 (json, headers, timeout 등)
 
     Returns:
         응답 JSON 딕셔너리
 
     Raises:
-        RuntimeError: 재시도 횟수 초과 시
+        CircuitOpenError: 호스트 서킷이 열려 있음 (RuntimeError 하위)
+        RuntimeError: 재시도 횟수/예산 초과 시
     """
     import requests
+    from retry_helper import RateLimited, call_with_retry, parse_retry_after, record_outbound
 
     kwargs.setdefault("timeout", 15)
-    last_error = None
-
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            resp = requests.request(method, url, **kwargs)
-
-            # 429 Rate Limit — 대기 후 재시도 (횟수 소모 안 함)
-            if resp.status_code == 429:
-                retry_after = int(resp.headers.get("Retry-After", 60))
-                log.warning("Rate limited (429), %ds 대기", retry_after)
-                time.sleep(retry_after)
-                continue
-
-            resp.raise_for_status()
-
-            # JSON 응답이 아닐 수 있음
-            content_type = resp.headers.get("Content-Type", "")
-            if "application/json" in content_type:
-                return resp.json()
-            return {"text": resp.text, "status_code": resp.status_code}
-
-        except requests.exceptions.RequestException as e:
-            last_error = e
-            log.warning("요청 실패 (attempt %d/%d): %s", attempt, MAX_RETRIES, e)
-            if attempt < MAX_RETRIES:
-                time.sleep(RETRY_BACKOFF ** attempt)
-
-    raise RuntimeError(f"요청 실패 ({MAX_RETRIES}회 재시도 후): {url}") from last_error
+
+    cache = cached = None
+    # auth=, cookies= 인자는 캐시 키로 구분할 수 없으므로 캐시하지 않음 (헤더는 키에 포함)
+    if use_cache and method.upper() == "GET" and not (kwargs.get("auth") or kwargs.get("cookies")):
+        from http_cache_helper import get_cache, cache_key
+
+        cache = get_cache()
+        key = cache_key(url, kwargs.get("params"), kwargs.get("headers"))
+        cached = cache.lookup(key)
+        if cached is not None:
+            if cached.is_fresh():
+                return cache.record_hit(cached)
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.conditional_headers()}
+
+    def attempt() -> dict:
+        resp = requests.request(method, url, **kwargs)
+        record_outbound(len(resp.content), calls=0)  # 호출 수는 call_with_retry가 기록
+
+        # 429 Rate Limit — Retry-After + jitter 대기 후 재시도 (시도 횟수 미차감)
+        if resp.status_code == 429:
+            raise RateLimited(parse_retry_after(resp.headers.get("Retry-After")))
+
+        # 304 Not Modified — 캐시된 파싱 결과 재사용
+        if resp.status_code == 304 and cached is not None:
+            return cache.revalidate(key, cached, resp.headers)
+
+        # 4xx/5xx → HTTPError (브레이커엔 5xx만 장애로 기록 — retry_helper.is_host_failure)
+        resp.raise_for_status()
+
+        # JSON 응답이 아닐 수 있음
+        content_type = resp.headers.get("Content-Type", "")
+        if "application/json" in content_type:
+            data = resp.json()
+        else:
+            data = {"text": resp.text, "status_code": resp.status_code}
+        if cache is not None:
+            cache.store(key, resp.headers, data)
+        return data
+
+    return call_with_retry(
+        url, attempt,
+        max_retries=MAX_RETRIES,
+        budget=budget,
+        base=RETRY_BACKOFF,
+        cap=RETRY_BACKOFF_CAP,
+    )
 
 
 # ── CLI 직접 실행 (로컬 테스트용) ───────────────────────
@@ -33,10 +33,32 @@ from __future__ import annotations
 import datetime
 import logging
 import math
+import threading
 from typing import Any
 
 log = logging.getLogger(__name__)
 
+_clients: dict = {}
+_clients_lock = threading.Lock()
+
+
+# ── 클라이언트 ───────────────────────────────────────────
+
+def get_client(project: str):
+    """
+    프로젝트별 BigQuery 클라이언트 (프로세스 내 재사용).
+    생성 시 인증 정보 탐색 비용이 크므로 호출마다 만들지 않음.
+    """
+    client = _clients.get(project)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(project)
+            if client is None:
+                from google.cloud import bigquery
+
+                client = _clients[project] = bigquery.Client(project=project)
+    return client
+
 
 # ── 테이블 생성 ──────────────────────────────────────────
 
@@ -64,7 +86,7 @@ def ensure_table(
     from google.cloud import bigquery
     import google.cloud.exceptions
 
-    client = bigquery.Client(project=project)
+    client = get_client(project)
     table_ref = f"{project}.{dataset}.{table}"
 
     try:
@@ -119,7 +141,7 @@ def upsert(
 
     from google.cloud import bigquery
 
-    client = bigquery.Client(project=project)
+    client = get_client(project)
     target = f"`{project}.{dataset}.{table}`"
     staging_name = f"_staging_{table}"
     staging = f"`{project}.{dataset}.{staging_name}`"
@@ -198,9 +220,7 @@ def simple_insert(
     if not rows:
         return {"inserted": 0, "errors": []}
 
-    from google.cloud import bigquery
-
-    client = bigquery.Client(project=project)
+    client = get_client(project)
     table_ref = f"{project}.{dataset}.{table}"
 
     clean_rows = [_clean_row(r) for r in rows]
@@ -230,7 +250,7 @@ def run_query(project: str, sql: str, params: dict | None = None) -> list[dict]:
     """
     from google.cloud import bigquery
 
-    client = bigquery.Client(project=project)
+    client = get_client(project)
 
     job_config = None
     if params:
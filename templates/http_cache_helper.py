@@ -0,0 +1,302 @@
+"""
+HTTP 응답 캐시 헬퍼 (조건부 요청)
+같은 엔드포인트(환율, 카탈로그 등)를 주기적으로 폴링하는 잡에서
+바뀌지 않은 응답을 다시 다운로드/파싱하지 않기 위해 사용.
+
+동작:
+  - Cache-Control max-age 안이면 요청 없이 캐시 반환 (hit)
+  - 만료됐지만 ETag / Last-Modified가 있으면 If-None-Match / If-Modified-Since로
+    조건부 요청 → 304면 캐시된 파싱 결과 재사용 (revalidated)
+  - 그 외에는 전체 다운로드 후 저장 (miss)
+  - Cache-Control no-store / Vary: * 응답은 저장하지 않음, no-cache는 매번 재검증
+  - 캐시 키에 요청 헤더(Authorization, API 키, Accept 등) 해시 포함 → 인증 정보별로 분리
+
+저장소:
+  - 메모리 LRU (기본 256개)
+  - HTTP_CACHE_DIR 환경 변수를 주면 로컬 디스크에도 저장 (인스턴스 재시작 후에도 재검증 가능)
+    Cloud Run에서는 /tmp가 메모리 기반이므로 용량 주의
+
+사용 예시:
+  # batch_job_sync.fetch_with_retry의 GET 요청에서 선택적으로 사용
+  data = fetch_with_retry("https://api.example.com/rates", use_cache=True)
+
+  from http_cache_helper import get_cache
+  get_cache().stats()  # → {"hits": 3, "revalidated": 10, "misses": 2, "entries": 5}
+
+캐시에서 돌려주는 결과는 호출마다 복사본이므로 호출 측에서 수정해도 캐시에 영향 없음.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class CacheEntry:
+    """캐시된 응답 1개 (파싱된 결과 + 검증자 + 만료 시각)."""
+
+    def __init__(self, data, etag=None, last_modified=None, expires_at=0.0, no_cache=False):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.no_cache = no_cache
+
+    def is_fresh(self) -> bool:
+        return not self.no_cache and time.time() < self.expires_at
+
+    def conditional_headers(self) -> dict:
+        """재검증용 조건부 요청 헤더."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self) -> dict:
+        return {
+            "data": self.data,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "expires_at": self.expires_at,
+            "no_cache": self.no_cache,
+        }
+
+
+class HttpCache:
+    """메모리 LRU + (선택) 디스크 저장소. 스레드 안전."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, disk_dir: str | None = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """캐시 조회 (메모리 → 디스크 순). 신선도 판단은 호출 측에서 is_fresh()로."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._load_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._put(key, entry)
+        return entry
+
+    def record_hit(self, entry: CacheEntry):
+        """요청 없이 캐시 사용."""
+        with self._lock:
+            self.hits += 1
+        return copy.deepcopy(entry.data)
+
+    def revalidate(self, key: str, entry: CacheEntry, headers) -> object:
+        """
+        304 응답 처리: 만료 시각/검증자를 갱신한 새 엔트리로 교체 후 캐시된 결과 반환.
+        기존 엔트리는 다른 스레드가 읽는 중일 수 있으므로 수정하지 않음.
+        """
+        fresh = _entry_from_headers(entry.data, headers)
+        if fresh is not None:
+            entry = CacheEntry(
+                entry.data,
+                etag=fresh.etag or entry.etag,
+                last_modified=fresh.last_modified or entry.last_modified,
+                expires_at=fresh.expires_at,
+                no_cache=fresh.no_cache,
+            )
+        with self._lock:
+            self.revalidated += 1
+            self._put(key, entry)
+        self._save_disk(key, entry)
+        return copy.deepcopy(entry.data)
+
+    def store(self, key: str, headers, data) -> None:
+        """200 응답 처리: 캐시 가능한 응답이면 복사본을 저장 (호출 측 수정과 분리)."""
+        entry = _entry_from_headers(data, headers)
+        if entry is not None:
+            entry.data = copy.deepcopy(data)
+        with self._lock:
+            self.misses += 1
+            if entry is None:
+                self._entries.pop(key, None)
+            else:
+                self._put(key, entry)
+        if entry is None:
+            self._delete_disk(key)
+        else:
+            self._save_disk(key, entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _put(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ── 디스크 저장소 ───────────────────────────────────
+
+    def _disk_path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{name}.json")
+
+    def _load_disk(self, key: str) -> CacheEntry | None:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                raw = json.load(f)
+            return CacheEntry(**raw)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("디스크 캐시 읽기 실패 (%s): %s", key, e)
+            return None
+
+    def _delete_disk(self, key: str) -> None:
+        if not self.disk_dir:
+            return
+        try:
+            os.remove(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("디스크 캐시 삭제 실패 (%s): %s", key, e)
+
+    def _save_disk(self, key: str, entry: CacheEntry) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            log.warning("디스크 캐시 쓰기 실패 (%s): %s", key, e)
+
+
+# ── 기본 캐시 ────────────────────────────────────────────
+
+_default_cache: HttpCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> HttpCache:
+    """프로세스 공용 캐시. HTTP_CACHE_DIR, HTTP_CACHE_MAX_ENTRIES 환경 변수로 설정."""
+    global _default_cache
+
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache(
+                max_entries=int(os.getenv("HTTP_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                disk_dir=os.getenv("HTTP_CACHE_DIR") or None,
+            )
+        return _default_cache
+
+
+def cache_key(url: str, params=None, headers: dict | None = None) -> str:
+    """
+    실제 요청 URL(쿼리 파라미터 인코딩 후) + 요청 헤더 기준 캐시 키.
+    params는 requests와 같은 형태(dict, 튜플 리스트, 문자열) 모두 허용.
+    헤더가 다르면(다른 API 키, Accept 등) 다른 키. 헤더 값은 해시로만 포함
+    (키가 로그와 디스크 파일명 계산에 쓰이므로 인증 정보를 그대로 남기지 않음).
+    """
+    key = _request_url(url, params)
+    request_headers = sorted(
+        (name.lower(), str(value))
+        for name, value in (headers or {}).items()
+        if name.lower() not in _CONDITIONAL_HEADERS
+    )
+    if request_headers:
+        digest = hashlib.sha256(json.dumps(request_headers).encode("utf-8")).hexdigest()
+        key = f"{key}#headers={digest}"
+    return key
+
+
+# ── 내부 헬퍼 ────────────────────────────────────────────
+
+_CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+def _request_url(url: str, params) -> str:
+    """requests가 실제로 보낼 URL (params 인코딩 포함). requests가 없으면 urlencode로 대체."""
+    try:
+        import requests
+    except ImportError:
+        if not params:
+            return url
+        query = params if isinstance(params, str) else urlencode(params, doseq=True)
+        return f"{url}{'&' if '?' in url else '?'}{query}"
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+def _entry_from_headers(data, headers) -> CacheEntry | None:
+    """응답 헤더로 캐시 엔트리 구성. 캐시 불가(no-store, Vary: *, 검증자/만료 없음)면 None."""
+    directives = _parse_cache_control(headers.get("Cache-Control", ""))
+    if "no-store" in directives or headers.get("Vary", "").strip() == "*":
+        return None
+
+    etag = headers.get("ETag")
+    last_modified = headers.get("Last-Modified")
+    no_cache = "no-cache" in directives
+
+    expires_at = 0.0
+    max_age = directives.get("max-age")
+    if max_age is not None:
+        try:
+            age = int(headers.get("Age", 0))
+            expires_at = time.time() + int(max_age) - age
+        except ValueError:
+            pass
+    elif headers.get("Expires"):
+        try:
+            expires_at = parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            pass
+
+    if not etag and not last_modified and expires_at <= time.time():
+        return None
+    return CacheEntry(data, etag, last_modified, expires_at, no_cache)
+
+
+def _parse_cache_control(value: str) -> dict:
+    """"max-age=60, no-cache" → {"max-age": "60", "no-cache": None}"""
+    directives = {}
+    for part in value.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip()] = arg.strip().strip('"') or None
+    return directives
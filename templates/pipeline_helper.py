@@ -0,0 +1,583 @@
+"""
+스트리밍 파이프라인 헬퍼 (fetch → transform → load)
+수집 / 가공 / 적재 단계를 크기 제한 큐로 연결해 동시에 실행할 때 사용.
+
+"전부 수집 → 전부 가공 → 전부 적재" 방식과 달리
+API 수집과 BigQuery 적재가 겹쳐서 진행되고, 전체 데이터를 메모리에 들고 있지 않음.
+큐가 가득 차면 앞 단계가 대기하므로 (backpressure) 느린 적재가 메모리를 터뜨리지 않음.
+
+사용 예시:
+  from pipeline_helper import Pipeline, BigQuerySink
+
+  pipe = Pipeline("exchange_rates", queue_size=100)
+  pipe.stage("fetch", fetch_page, workers=4, fan_out=True)  # 페이지 번호 → 행 리스트
+  pipe.stage("transform", to_row)                           # None 반환 시 필터링
+  pipe.sink("load", BigQuerySink("my-project", "my_dataset", "rates",
+                                 key_columns=["date", "currency"]), batch_size=500)
+
+  # sync 잡 (스레드 기반)
+  result = pipe.run(range(1, 51))
+
+  # async 잡 (asyncio 기반, 코루틴 함수도 스테이지로 사용 가능)
+  result = await pipe.run_async(range(1, 51))
+
+  # result:
+  # {"processed": 1234, "errors": 2, "elapsed_sec": 12.3,
+  #  "stages": {"fetch": {"received": 50, "emitted": 1236, ...}, ...}}
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+log = logging.getLogger(__name__)
+
+_DONE = object()    # 스트림 종료 표시 (sentinel)
+_POLL_SEC = 0.1     # 스레드 모드에서 중단 여부 확인 주기
+
+
+class PipelineAborted(RuntimeError):
+    """파이프라인이 치명적 오류로 중단됨 (소스 실패, 에러 한도 초과)."""
+
+
+# ── 스테이지 지표 ────────────────────────────────────────
+
+class StageStats:
+    """스테이지별 처리량 지표."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.received = 0           # 입력받은 항목 수
+        self.emitted = 0            # 다음 단계로 넘긴 항목 수 (sink는 적재 성공 행 수)
+        self.errors = 0             # 실패 항목 수 (dropped 포함)
+        self.dropped = 0            # 중단으로 처리하지 못하고 버린 항목 수
+        self.busy_sec = 0.0         # 스테이지 함수 실행에 쓴 시간 (워커 합계)
+        self.queue_high_water = 0   # 입력 큐 최대 적재량 (backpressure 지표)
+        self.started: float | None = None
+        self.finished: float | None = None
+        self._lock = threading.Lock()
+
+    def record(self, received=0, emitted=0, errors=0, busy_sec=0.0) -> None:
+        with self._lock:
+            self.received += received
+            self.emitted += emitted
+            self.errors += errors
+            self.busy_sec += busy_sec
+
+    def drop(self, count: int, received: bool = False) -> None:
+        """
+        중단으로 버린 항목을 에러로 집계. received=False면 입력 수에도 더함
+        (큐에 남았거나 넘기지 못한 항목 → 받은 수 = 내보낸 수 + 에러 수 유지).
+        """
+        if count <= 0:
+            return
+        with self._lock:
+            self.dropped += count
+            self.errors += count
+            if not received:
+                self.received += count
+
+    def touch(self) -> None:
+        """첫 입력 수신 시각 기록 (items_per_sec 기준점)."""
+        if self.started is None:
+            self.started = time.time()
+
+    def observe_queue(self, depth: int) -> None:
+        if depth > self.queue_high_water:
+            self.queue_high_water = depth
+
+    def to_dict(self) -> dict:
+        wall = (self.finished or time.time()) - (self.started or time.time())
+        return {
+            "received": self.received,
+            "emitted": self.emitted,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "busy_sec": round(self.busy_sec, 3),
+            "items_per_sec": round(self.received / wall, 1) if wall > 0 else None,
+            "queue_high_water": self.queue_high_water,
+        }
+
+
+class _Stage:
+    def __init__(self, name, func, workers, fan_out, batch_size):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.fan_out = fan_out
+        self.batch_size = batch_size    # None이 아니면 sink (배치 단위 호출)
+        self.is_async = inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(
+            getattr(func, "__call__", None)
+        )
+
+
+# ── 파이프라인 ───────────────────────────────────────────
+
+class Pipeline:
+    """
+    bounded 큐로 연결된 스테이지 체인.
+
+    스테이지 함수 규칙:
+      - stage: func(item) → 결과 1개 (None이면 필터링, fan_out=True면 결과 리스트)
+      - sink:  func(batch: list) → 적재 성공 행 수 (None이면 len(batch))
+      - 항목 단위 예외는 해당 스테이지 errors로 집계하고 다음 항목 계속 처리
+      - 소스 순회 실패, max_errors 초과 시 전체 중단 (result["error"]에 사유 기록)
+      - 중단 시 큐에 남은 항목, 적재 전 sink 버퍼는 dropped로 errors에 포함
+        (processed + errors가 입력 전체를 설명하도록)
+    """
+
+    def __init__(self, name: str, queue_size: int = 100, max_errors: int | None = None):
+        """
+        Args:
+            name: 로그/지표용 파이프라인 이름
+            queue_size: 스테이지 사이 큐 최대 크기 (backpressure 기준)
+            max_errors: 누적 에러가 이 값을 넘으면 중단. None이면 무제한.
+        """
+        self.name = name
+        self.queue_size = queue_size
+        self.max_errors = max_errors
+        self._stages: list[_Stage] = []
+
+    def stage(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        fan_out: bool = False,
+    ) -> "Pipeline":
+        """항목 단위 스테이지 추가. workers개 워커가 같은 입력 큐를 나눠 처리."""
+        if self._stages and self._stages[-1].batch_size is not None:
+            raise ValueError("sink 뒤에는 스테이지를 추가할 수 없습니다")
+        self._stages.append(_Stage(name, func, workers, fan_out, None))
+        return self
+
+    def sink(
+        self,
+        name: str,
+        func: Callable[[list], int | None],
+        batch_size: int = 500,
+        workers: int = 1,
+    ) -> "Pipeline":
+        """
+        마지막 적재 스테이지 추가. 항목을 batch_size씩 모아 func(batch) 호출.
+        스트림 종료 시 남은 항목도 한 번 더 flush.
+        """
+        if self._stages and self._stages[-1].batch_size is not None:
+            raise ValueError("sink는 하나만 추가할 수 있습니다")
+        if workers > 1 and getattr(func, "key_columns", None):
+            # upsert는 _staging_{table}을 공유하므로 동시 실행 시 서로 덮어씀
+            raise ValueError("upsert sink는 workers=1만 지원합니다")
+        self._stages.append(_Stage(name, func, workers, False, batch_size))
+        return self
+
+    # ── 스레드 기반 실행 (sync 잡) ──────────────────────
+
+    def run(self, source: Iterable) -> dict:
+        """
+        스레드 기반 실행. sync 잡(run_job)에서 사용.
+        스테이지 함수는 일반 함수여야 함 (requests, bigquery_helper 등 블로킹 I/O OK).
+        """
+        self._check()
+        start = time.time()
+        stats = [StageStats(s.name) for s in self._stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self._stages]
+        abort = threading.Event()
+        fatal: list[BaseException] = []
+
+        log.info("파이프라인 '%s' 시작 (threads, stages=%s)", self.name, self._stage_names())
+
+        # 호출 스레드의 contextvars(run_history_helper 실행 지표 등)를 워커에도 전달
+        threads = [threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._thread_feed, source, queues[0], stats[0], abort, fatal),
+            name=f"{self.name}-source",
+            daemon=True,
+        )]
+        for i, stage in enumerate(self._stages):
+            out_q = queues[i + 1] if i + 1 < len(queues) else None
+            out_stats = stats[i + 1] if i + 1 < len(stats) else None
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+            for w in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(self._thread_worker, stage, stats, i, queues[i], out_q, out_stats,
+                          remaining, remaining_lock, abort, fatal),
+                    name=f"{self.name}-{stage.name}-{w}",
+                    daemon=True,
+                ))
+
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for q, st in zip(queues, stats):
+            st.drop(_drain(q))
+
+        return self._result(start, stats, fatal[0] if fatal else None)
+
+    def _thread_feed(self, source, out_q, out_stats, abort, fatal):
+        try:
+            for item in source:
+                if not _thread_put(out_q, item, abort, out_stats):
+                    out_stats.drop(1)
+                    return
+        except Exception as e:
+            log.error("파이프라인 '%s' 소스 실패: %s", self.name, e)
+            _set_fatal(fatal, abort, e)
+        finally:
+            _thread_put(out_q, _DONE, abort)
+
+    def _thread_worker(self, stage, stats, idx, in_q, out_q, out_stats,
+                       remaining, remaining_lock, abort, fatal):
+        st = stats[idx]
+        buffer: list = []
+        try:
+            while not abort.is_set():
+                try:
+                    item = in_q.get(timeout=_POLL_SEC)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    _thread_put(in_q, _DONE, abort)  # 같은 스테이지 다른 워커에게 전달
+                    break
+                st.touch()
+
+                if stage.batch_size is not None:
+                    st.record(received=1)
+                    buffer.append(item)
+                    if len(buffer) >= stage.batch_size:
+                        self._flush_sync(stage, st, buffer)
+                        buffer = []
+                        self._check_errors(stats)
+                    continue
+
+                outputs = self._call_sync(stage, st, item)
+                if out_q is not None:
+                    for sent, out in enumerate(outputs):
+                        if not _thread_put(out_q, out, abort, out_stats):
+                            out_stats.drop(len(outputs) - sent)
+                            break
+                self._check_errors(stats)
+
+            if buffer and not abort.is_set():
+                self._flush_sync(stage, st, buffer)
+                buffer = []
+                self._check_errors(stats)
+        except PipelineAborted as e:
+            _set_fatal(fatal, abort, e)
+        except Exception as e:
+            log.error("파이프라인 '%s' 스테이지 '%s' 치명적 오류: %s", self.name, stage.name, e)
+            _set_fatal(fatal, abort, e)
+        finally:
+            st.drop(len(buffer), received=True)  # 중단으로 적재하지 못한 행
+            with remaining_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                st.finished = time.time()
+                if out_q is not None:
+                    _thread_put(out_q, _DONE, abort)
+
+    def _call_sync(self, stage, st, item) -> list:
+        t0 = time.time()
+        try:
+            outputs = _outputs(stage, stage.func(item))  # fan_out 반환값이 iterable이 아니면 항목 에러
+        except Exception as e:
+            log.warning("[%s/%s] 항목 처리 실패: %s", self.name, stage.name, e)
+            st.record(received=1, errors=1, busy_sec=time.time() - t0)
+            return []
+        st.record(received=1, emitted=len(outputs), busy_sec=time.time() - t0)
+        return outputs
+
+    def _flush_sync(self, stage, st, batch) -> None:
+        t0 = time.time()
+        try:
+            written = stage.func(batch)
+        except Exception as e:
+            log.error("[%s/%s] 배치 적재 실패 (%d행): %s", self.name, stage.name, len(batch), e)
+            st.record(errors=len(batch), busy_sec=time.time() - t0)
+            return
+        self._record_flush(st, batch, written, time.time() - t0)
+
+    # ── asyncio 기반 실행 (async 잡) ────────────────────
+
+    async def run_async(self, source: Iterable | Any) -> dict:
+        """
+        asyncio 기반 실행. async 잡(MyAsyncJob.run)에서 사용.
+        source는 일반 iterable 또는 async iterable.
+        코루틴 함수는 그대로 await, 일반 함수는 asyncio.to_thread로 실행
+        (BigQuerySink 같은 블로킹 호출이 이벤트 루프를 막지 않음).
+        """
+        self._check()
+        start = time.time()
+        stats = [StageStats(s.name) for s in self._stages]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self._stages]
+
+        log.info("파이프라인 '%s' 시작 (asyncio, stages=%s)", self.name, self._stage_names())
+
+        tasks = [asyncio.create_task(self._async_feed(source, queues[0], stats[0]))]
+        for i, stage in enumerate(self._stages):
+            out_q = queues[i + 1] if i + 1 < len(queues) else None
+            out_stats = stats[i + 1] if i + 1 < len(stats) else None
+            remaining = [stage.workers]
+            for _ in range(stage.workers):
+                tasks.append(asyncio.create_task(
+                    self._async_worker(stage, stats, i, queues[i], out_q, out_stats, remaining)
+                ))
+
+        fatal = None
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            log.error("파이프라인 '%s' 중단: %s", self.name, e)
+            fatal = e
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for q, st in zip(queues, stats):
+            st.drop(_drain(q))
+
+        return self._result(start, stats, fatal)
+
+    async def _async_feed(self, source, out_q, out_stats):
+        holding = False  # 소스에서 꺼냈지만 아직 큐에 넣지 못한 항목
+        try:
+            if hasattr(source, "__aiter__"):
+                async for item in source:
+                    holding = True
+                    await _async_put(out_q, item, out_stats)
+                    holding = False
+            else:
+                for item in source:
+                    holding = True
+                    await _async_put(out_q, item, out_stats)
+                    holding = False
+        except asyncio.CancelledError:
+            out_stats.drop(int(holding))
+            raise
+        await out_q.put(_DONE)
+
+    async def _async_worker(self, stage, stats, idx, in_q, out_q, out_stats, remaining):
+        # 예외 발생 시 run_async가 전체 태스크를 취소하므로 종료 처리는 정상 경로에서만,
+        # 취소 시에는 손에 든 항목(처리 중 입력, 못 넘긴 결과, sink 버퍼)만 dropped로 집계
+        st = stats[idx]
+        buffer: list = []
+        inflight = 0
+        outputs: list = []
+        sent = 0
+        try:
+            while True:
+                item = await in_q.get()
+                if item is _DONE:
+                    await in_q.put(_DONE)  # 같은 스테이지 다른 워커에게 전달
+                    break
+                st.touch()
+
+                if stage.batch_size is not None:
+                    st.record(received=1)
+                    buffer.append(item)
+                    if len(buffer) >= stage.batch_size:
+                        await self._flush_async(stage, st, buffer)
+                        buffer = []
+                        self._check_errors(stats)
+                    continue
+
+                inflight = 1
+                outputs = await self._call_async(stage, st, item)
+                inflight = 0
+                if out_q is not None:
+                    for sent, out in enumerate(outputs):
+                        await _async_put(out_q, out, out_stats)
+                outputs, sent = [], 0
+                self._check_errors(stats)
+
+            if buffer:
+                await self._flush_async(stage, st, buffer)
+                buffer = []
+                self._check_errors(stats)
+        except asyncio.CancelledError:
+            st.drop(inflight)
+            st.drop(len(buffer), received=True)
+            if out_stats is not None:
+                out_stats.drop(len(outputs) - sent)
+            raise
+
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            st.finished = time.time()
+            if out_q is not None:
+                await out_q.put(_DONE)
+
+    async def _call_async(self, stage, st, item) -> list:
+        t0 = time.time()
+        try:
+            if stage.is_async:
+                result = await stage.func(item)
+            else:
+                result = await asyncio.to_thread(stage.func, item)
+            outputs = _outputs(stage, result)  # fan_out 반환값이 iterable이 아니면 항목 에러
+        except Exception as e:
+            log.warning("[%s/%s] 항목 처리 실패: %s", self.name, stage.name, e)
+            st.record(received=1, errors=1, busy_sec=time.time() - t0)
+            return []
+        st.record(received=1, emitted=len(outputs), busy_sec=time.time() - t0)
+        return outputs
+
+    async def _flush_async(self, stage, st, batch) -> None:
+        t0 = time.time()
+        try:
+            if stage.is_async:
+                written = await stage.func(batch)
+            else:
+                written = await asyncio.to_thread(stage.func, batch)
+        except Exception as e:
+            log.error("[%s/%s] 배치 적재 실패 (%d행): %s", self.name, stage.name, len(batch), e)
+            st.record(errors=len(batch), busy_sec=time.time() - t0)
+            return
+        self._record_flush(st, batch, written, time.time() - t0)
+
+    # ── 공통 ────────────────────────────────────────────
+
+    def _check(self) -> None:
+        if not self._stages:
+            raise ValueError(f"파이프라인 '{self.name}'에 스테이지가 없습니다")
+
+    def _stage_names(self) -> list[str]:
+        return [s.name for s in self._stages]
+
+    def _check_errors(self, stats: list[StageStats]) -> None:
+        if self.max_errors is None:
+            return
+        total = sum(s.errors for s in stats)
+        if total > self.max_errors:
+            raise PipelineAborted(f"에러 한도 초과 ({total} > {self.max_errors})")
+
+    @staticmethod
+    def _record_flush(st: StageStats, batch: list, written, busy: float) -> None:
+        written = len(batch) if written is None else int(written)
+        st.record(emitted=written, errors=len(batch) - written, busy_sec=busy)
+
+    def _result(self, start: float, stats: list[StageStats], fatal) -> dict:
+        """잡 템플릿과 같은 processed/errors/elapsed_sec 형식으로 결과 구성."""
+        now = time.time()
+        for st in stats:
+            if st.finished is None:
+                st.finished = now
+        errors = sum(st.errors for st in stats)
+        if fatal is not None:
+            errors += 1
+
+        result = {
+            "processed": stats[-1].emitted,
+            "errors": errors,
+            "elapsed_sec": round(now - start, 1),
+            "stages": {st.name: st.to_dict() for st in stats},
+        }
+        if fatal is not None:
+            result["error"] = str(fatal)
+        log.info("파이프라인 '%s' 완료: processed=%d, errors=%d, elapsed=%.1fs",
+                 self.name, result["processed"], errors, result["elapsed_sec"])
+        return result
+
+
+# ── BigQuery sink ────────────────────────────────────────
+
+class BigQuerySink:
+    """
+    파이프라인 마지막 단계용 BigQuery 적재기.
+    key_columns가 있으면 bigquery_helper.upsert, 없으면 simple_insert 사용.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        dataset: str,
+        table: str,
+        key_columns: list[str] | None = None,
+        update_columns: list[str] | None = None,
+        dry_run: bool = False,
+    ):
+        self.project = project
+        self.dataset = dataset
+        self.table = table
+        self.key_columns = key_columns
+        self.update_columns = update_columns
+        self.dry_run = dry_run
+
+    def __call__(self, rows: list[dict]) -> int:
+        """rows 적재 후 성공 행 수 반환."""
+        if self.dry_run:
+            log.info("[DRY RUN] %s.%s 적재 스킵: %d행", self.dataset, self.table, len(rows))
+            return len(rows)
+
+        from bigquery_helper import simple_insert, upsert
+
+        if self.key_columns:
+            result = upsert(
+                self.project, self.dataset, self.table, rows,
+                key_columns=self.key_columns,
+                update_columns=self.update_columns,
+                chunk_size=max(len(rows), 1),
+            )
+            return result["merged"]
+
+        result = simple_insert(self.project, self.dataset, self.table, rows)
+        return result["inserted"] - len(result["errors"])
+
+
+# ── 내부 헬퍼 ────────────────────────────────────────────
+
+def _outputs(stage: _Stage, result) -> list:
+    """스테이지 함수 반환값 → 다음 단계로 넘길 항목 리스트."""
+    if result is None:
+        return []
+    if stage.fan_out:
+        return [r for r in result if r is not None]
+    return [result]
+
+
+def _thread_put(q: queue.Queue, item, abort: threading.Event, stats: StageStats | None = None) -> bool:
+    """큐가 찰 때 대기 (backpressure). 중단 신호가 오면 False."""
+    while True:
+        if abort.is_set() and item is not _DONE:
+            return False
+        try:
+            q.put(item, timeout=_POLL_SEC)
+        except queue.Full:
+            if abort.is_set():
+                return False
+            continue
+        if stats is not None:
+            stats.observe_queue(q.qsize())
+        return True
+
+
+def _drain(q) -> int:
+    """중단 후 큐에 남은 항목 수 (종료 표시 제외). queue.Queue / asyncio.Queue 공용."""
+    count = 0
+    while True:
+        try:
+            item = q.get_nowait()
+        except (queue.Empty, asyncio.QueueEmpty):
+            return count
+        if item is not _DONE:
+            count += 1
+
+
+async def _async_put(q: asyncio.Queue, item, stats: StageStats | None = None) -> None:
+    await q.put(item)
+    if stats is not None:
+        stats.observe_queue(q.qsize())
+
+
+def _set_fatal(fatal: list, abort: threading.Event, error: BaseException) -> None:
+    if not fatal:
+        fatal.append(error)
+    abort.set()
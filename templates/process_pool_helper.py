@@ -0,0 +1,370 @@
+"""
+프로세스 풀 헬퍼 (CPU 바운드 변환 오프로드)
+gunicorn이 1 워커 + 8 스레드로 돌기 때문에 파싱, pandas/numpy 계산 같은
+CPU 작업은 GIL에 묶여 코어 1개만 씀. 이런 변환을 별도 프로세스로 나눠 돌릴 때 사용.
+
+특징:
+  - 엔드포인트 앱 시작 시 1번만 생성 (batch_endpoint.py의 init_process_pool 호출)
+  - 크기는 실제 할당된 CPU 수 기준 (Cloud Run cgroup 쿼터 반영)
+  - forkserver 방식으로 자식 프로세스 생성 → 부모의 BigQuery/Secret Manager
+    클라이언트(gRPC 스레드, 소켓)를 복제하지 않음
+  - numpy 배열 / Arrow 테이블은 공유 메모리로 전달 → 대용량 데이터 pickle 비용 없음
+  - PROCESS_POOL_WORKERS=0이면 풀을 만들지 않고 map_*는 현재 프로세스에서 순서대로 실행
+  - 워커가 비정상 종료(OOM kill 등)해 풀이 깨지면 map_*가 풀을 새로 만들고 1번 재시도
+
+사용 예시 (잡 코드):
+  from process_pool_helper import map_chunks, map_array, map_table
+
+  # 리스트 → 청크 단위로 나눠 병렬 처리 (청크는 pickle로 전달)
+  rows = map_chunks(parse_records, raw_records, chunk_size=5000, flatten=True)
+
+  # numpy 배열 → 공유 메모리 (복사 없이 워커가 구간을 직접 읽음)
+  sums = map_array(chunk_stats, prices)
+
+  # pyarrow Table → Arrow IPC 버퍼를 공유 메모리에 한 번 기록
+  parts = map_table(summarize, table)
+
+주의:
+  - 워커 함수는 모듈 최상위에 정의해야 함 (lambda, 중첩 함수 불가 — pickle 대상)
+  - 워커 함수 안에서 Google 클라이언트를 만들지 말 것 (변환만 수행)
+  - 워커 함수 반환값은 pickle로 돌아오므로 작게 유지 (요약값, 행 리스트 등)
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Sequence
+
+log = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+# ── 풀 생명주기 ──────────────────────────────────────────
+
+def available_cpus() -> int:
+    """
+    컨테이너에 실제 할당된 CPU 수.
+    os.cpu_count()는 호스트 전체 코어를 돌려주므로 cgroup 쿼터를 우선 확인.
+    """
+    # cgroup v2 (Cloud Run 2세대): "200000 100000" → 2 CPU
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return max(1, quota // period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def init_process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    프로세스 풀 생성 (이미 있으면 기존 풀 반환).
+    앱 시작 시 1번 호출. 잡 코드에서는 get_process_pool() 또는 map_* 사용.
+
+    Args:
+        max_workers: 워커 수. None이면 available_cpus().
+    """
+    global _pool, _pool_size
+
+    with _pool_lock:
+        if _pool is None:
+            _create_pool(max_workers or available_cpus())
+        return _pool
+
+
+def _create_pool(size: int) -> None:
+    """풀 생성 + 워커 미리 띄우기. _pool_lock 안에서 호출."""
+    global _pool, _pool_size
+
+    # forkserver: 깨끗한 서버 프로세스에서 fork → 부모의 gRPC/인증 상태 미복제
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    ctx = multiprocessing.get_context(method)
+    _pool = ProcessPoolExecutor(max_workers=size, mp_context=ctx)
+    _pool_size = size
+
+    # 워커를 미리 띄워둠 (첫 요청에서 프로세스 생성 지연 방지)
+    for f in [_pool.submit(os.getpid) for _ in range(size)]:
+        f.result()
+    log.info("프로세스 풀 생성: workers=%d, start_method=%s", size, method)
+
+
+def _replace_broken_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    깨진 풀(워커 비정상 종료)을 종료하고 같은 크기로 다시 생성.
+    다른 스레드가 이미 교체했으면 새 풀을 그대로 반환.
+    """
+    with _pool_lock:
+        if _pool is broken:
+            log.warning("프로세스 풀 손상 — 재생성 (workers=%d)", _pool_size)
+            broken.shutdown(wait=False, cancel_futures=True)
+            _create_pool(_pool_size)
+        return _pool
+
+
+def pool_disabled() -> bool:
+    """PROCESS_POOL_WORKERS=0으로 풀을 끈 상태인지."""
+    return os.getenv("PROCESS_POOL_WORKERS", "auto").strip() == "0"
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    현재 프로세스 풀. 아직 없으면 기본 크기로 생성 (CLI 로컬 실행 대비).
+
+    Raises:
+        RuntimeError: PROCESS_POOL_WORKERS=0으로 비활성화됨
+    """
+    if _pool is not None:
+        return _pool
+    if pool_disabled():
+        raise RuntimeError("프로세스 풀 비활성 (PROCESS_POOL_WORKERS=0)")
+    return init_process_pool()
+
+
+def shutdown_process_pool() -> None:
+    """프로세스 풀 종료. 앱 종료 시 atexit로 자동 호출."""
+    global _pool, _pool_size
+
+    with _pool_lock:
+        if _pool is None:
+            return
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_size = 0
+        log.info("프로세스 풀 종료")
+
+
+atexit.register(shutdown_process_pool)
+
+
+def pool_status() -> dict:
+    """/health 등에 노출할 풀 상태."""
+    return {"enabled": _pool is not None, "workers": _pool_size}
+
+
+# ── 잡용 API ─────────────────────────────────────────────
+
+def map_chunks(
+    func: Callable[[list], Any],
+    items: Sequence,
+    chunk_size: int | None = None,
+    flatten: bool = False,
+) -> list:
+    """
+    items를 청크로 나눠 func(chunk)를 워커 프로세스에서 병렬 실행.
+    청크는 pickle로 전달되므로 중간 크기 리스트(레코드, 문자열 등)에 적합.
+
+    Args:
+        func: 모듈 최상위 함수. 청크(list) → 결과
+        items: 입력 시퀀스
+        chunk_size: 청크 크기. None이면 워커 수 × 4개 청크로 균등 분할.
+        flatten: True면 각 청크 결과(리스트)를 이어붙여 반환
+
+    Returns:
+        청크 순서대로 정렬된 결과 리스트
+    """
+    if not items:
+        return []
+
+    pool = _pool_or_inline()
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(items) // (_workers(pool) * 4)))
+
+    chunks = [list(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+    if pool is None:
+        results = [func(chunk) for chunk in chunks]
+    else:
+        results = _run_with_recovery(pool, "map_chunks", lambda p: list(p.map(func, chunks)))
+    log.info("map_chunks(%s): %d건 → %d청크", func.__name__, len(items), len(chunks))
+
+    if flatten:
+        return [r for chunk_result in results for r in chunk_result]
+    return results
+
+
+def map_array(func: Callable[[Any], Any], array, n_chunks: int | None = None) -> list:
+    """
+    numpy 배열을 공유 메모리에 한 번 복사하고, 워커는 자기 구간만 복사 없이 읽음.
+    첫 번째 축(행) 기준으로 분할.
+
+    Args:
+        func: 모듈 최상위 함수. 배열 구간(읽기 전용 view) → 결과
+        array: numpy.ndarray
+        n_chunks: 분할 수. None이면 워커 수.
+
+    Returns:
+        구간 순서대로 정렬된 결과 리스트
+    """
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    array = np.ascontiguousarray(array)
+    if array.size == 0:
+        return []
+
+    pool = _pool_or_inline()
+    bounds = _split_bounds(array.shape[0], n_chunks or _workers(pool))
+    if pool is None:
+        view = array.view()
+        view.flags.writeable = False
+        return [func(view[start:stop]) for start, stop in bounds]
+
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        results = _run_with_recovery(pool, "map_array", lambda p: _collect([
+            p.submit(_array_worker, func, shm.name, array.shape, array.dtype.str, start, stop)
+            for start, stop in bounds
+        ]))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    log.info("map_array(%s): shape=%s → %d구간", func.__name__, array.shape, len(bounds))
+    return results
+
+
+def map_table(func: Callable[[Any], Any], table, n_chunks: int | None = None) -> list:
+    """
+    pyarrow Table을 Arrow IPC 스트림으로 공유 메모리에 기록하고,
+    워커는 같은 버퍼를 zero-copy로 열어 자기 행 구간(table.slice)만 처리.
+    pandas DataFrame은 pyarrow.Table.from_pandas(df)로 변환 후 전달.
+
+    Args:
+        func: 모듈 최상위 함수. pyarrow.Table 구간 → 결과
+        table: pyarrow.Table
+        n_chunks: 분할 수. None이면 워커 수.
+
+    Returns:
+        구간 순서대로 정렬된 결과 리스트
+    """
+    import pyarrow as pa
+    from multiprocessing import shared_memory
+
+    if table.num_rows == 0:
+        return []
+
+    pool = _pool_or_inline()
+    bounds = _split_bounds(table.num_rows, n_chunks or _workers(pool))
+    if pool is None:
+        return [func(table.slice(start, stop - start)) for start, stop in bounds]
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    buf = sink.getvalue()
+
+    shm = shared_memory.SharedMemory(create=True, size=buf.size)
+    try:
+        shm.buf[:buf.size] = memoryview(buf)
+        results = _run_with_recovery(pool, "map_table", lambda p: _collect([
+            p.submit(_table_worker, func, shm.name, buf.size, start, stop)
+            for start, stop in bounds
+        ]))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    log.info("map_table(%s): rows=%d → %d구간", func.__name__, table.num_rows, len(bounds))
+    return results
+
+
+# ── 워커 프로세스 측 ─────────────────────────────────────
+
+def _array_worker(func, shm_name, shape, dtype, start, stop):
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)[start:stop]
+        view.flags.writeable = False
+        result = func(view)
+        del view
+        return result
+    finally:
+        shm.close()
+
+
+def _table_worker(func, shm_name, size, start, stop):
+    import pyarrow as pa
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        reader = pa.ipc.open_stream(pa.py_buffer(shm.buf[:size]))
+        table = reader.read_all().slice(start, stop - start)
+        result = func(table)
+        del table, reader
+        return result
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # 워커 함수가 Arrow 버퍼 참조를 결과에 남긴 경우 — 매핑은 프로세스 종료 시 해제
+            log.warning("공유 메모리 참조가 남아 있어 close 생략: %s", shm_name)
+
+
+def _run_with_recovery(pool: ProcessPoolExecutor, name: str, run: Callable[[ProcessPoolExecutor], list]) -> list:
+    """
+    run(pool) 실행. 워커가 죽어 풀이 깨지면 풀을 재생성하고 1번 재시도.
+    재시도도 깨지면 풀은 다시 재생성해두고 RuntimeError (같은 입력이 워커를 죽이는 경우).
+    """
+    try:
+        return run(pool)
+    except BrokenProcessPool as e:
+        log.error("%s: 워커 프로세스 비정상 종료 (%s) — 풀 재생성 후 재시도", name, e)
+        pool = _replace_broken_pool(pool)
+    try:
+        return run(pool)
+    except BrokenProcessPool as e:
+        _replace_broken_pool(pool)
+        raise RuntimeError(
+            f"{name}: 재시도에서도 워커 프로세스가 비정상 종료됨 "
+            f"(메모리 부족 가능성 — 청크 크기/MEMORY 확인)"
+        ) from e
+
+
+def _collect(futures: list) -> list:
+    return [f.result() for f in futures]
+
+
+def _pool_or_inline() -> ProcessPoolExecutor | None:
+    """풀이 비활성(PROCESS_POOL_WORKERS=0)이면 None → 호출 측에서 현재 프로세스 실행."""
+    if _pool is None and pool_disabled():
+        return None
+    return get_process_pool()
+
+
+def _workers(pool: ProcessPoolExecutor | None) -> int:
+    return _pool_size if pool is not None else 1
+
+
+def _split_bounds(length: int, n_chunks: int) -> list[tuple[int, int]]:
+    """[0, length)를 최대 n_chunks개의 균등 구간으로 분할."""
+    n_chunks = max(1, min(n_chunks, length))
+    step = -(-length // n_chunks)
+    return [(i, min(i + step, length)) for i in range(0, length, step)]
@@ -0,0 +1,411 @@
+"""
+호스트별 서킷 브레이커 + 재시도 예산 헬퍼
+외부 API가 죽었을 때 모든 스레드가 같은 박자로 백오프하며 타임아웃까지 버티는 대신,
+빠르게 실패하고 자원을 돌려주기 위해 사용.
+
+구성:
+  - CircuitBreaker: 호스트별 closed → open → half-open 상태 전이 (실패율 기준)
+  - next_backoff: decorrelated jitter 백오프 (스레드끼리 재시도 타이밍이 겹치지 않음)
+  - RetryBudget: 잡 1회 실행 동안 쓸 수 있는 재시도 총량 제한
+  - call_with_retry / call_with_retry_async: 위 3개를 묶은 재시도 래퍼 (sync/async 같은 판단 로직)
+    · 실패 분류는 is_failure로 교체 가능 (기본: 5xx·연결 실패만 호스트 장애, 4xx는 아님)
+    · func가 RateLimited를 던지면 Retry-After + jitter만큼 대기 (시도 횟수 미차감)
+
+사용 예시:
+  from retry_helper import RetryBudget, call_with_retry, call_with_retry_async
+
+  budget = RetryBudget()  # 잡 실행마다 새로 생성
+
+  # sync (batch_job_sync.fetch_with_retry 도 내부적으로 call_with_retry 사용)
+  data = call_with_retry(url, lambda: requests.get(url, timeout=15).json(), budget=budget)
+
+  # async
+  data = await call_with_retry_async(url, lambda: fetch_json(session, url), budget=budget)
+
+  # 호스트가 open 상태면 CircuitOpenError (RuntimeError 하위) 즉시 발생
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlparse
+
+try:
+    from run_history_helper import record_outbound
+except ImportError:  # run_history_helper 없이 단독 사용 시
+    def record_outbound(nbytes: int = 0, calls: int = 1) -> None:
+        pass
+
+log = logging.getLogger(__name__)
+
+# ── 설정 ─────────────────────────────────────────────────
+
+FAILURE_RATE_THRESHOLD = 0.5   # 윈도우 내 실패율이 이 값 이상이면 open
+MIN_CALLS = 5                  # 실패율 판단에 필요한 최소 호출 수
+WINDOW_SEC = 60                # 실패율 집계 윈도우 (초)
+OPEN_SEC = 30                  # open 유지 시간 → 이후 half-open
+HALF_OPEN_PROBES = 1           # half-open에서 동시에 허용할 시험 호출 수
+
+BACKOFF_BASE = 1.0             # 백오프 최소값 (초)
+BACKOFF_CAP = 30.0             # 백오프 최대값 (초)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """호스트 서킷이 열려 있어 호출을 시도하지 않음."""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"서킷 open: {host} ({retry_after:.0f}초 후 재시도 가능)")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class RetryBudgetExhausted(RuntimeError):
+    """잡의 재시도 예산 소진."""
+
+
+# ── 서킷 브레이커 ────────────────────────────────────────
+
+class CircuitBreaker:
+    """호스트 1개에 대한 서킷 브레이커. 스레드 안전."""
+
+    def __init__(
+        self,
+        host: str,
+        failure_rate: float = FAILURE_RATE_THRESHOLD,
+        min_calls: int = MIN_CALLS,
+        window_sec: float = WINDOW_SEC,
+        open_sec: float = OPEN_SEC,
+        half_open_probes: int = HALF_OPEN_PROBES,
+    ):
+        self.host = host
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_sec = window_sec
+        self.open_sec = open_sec
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self._results: deque[tuple[float, bool]] = deque()  # (시각, 성공 여부)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        호출 전 확인. open이면 CircuitOpenError.
+        open_sec가 지나면 half-open으로 전환하고 시험 호출만 허용.
+        시험 호출이 open_sec 안에 결과를 기록하지 못하면 (취소 등) 슬롯을 회수하고 다시 허용.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_sec - time.time()
+                if remaining > 0:
+                    raise CircuitOpenError(self.host, remaining)
+                self.state = HALF_OPEN
+                self._probes = 0
+                log.info("서킷 half-open: %s", self.host)
+
+            if self.state == HALF_OPEN:
+                now = time.time()
+                if self._probes >= self.half_open_probes:
+                    if now - self._probe_at < self.open_sec:
+                        raise CircuitOpenError(self.host, self._probe_at + self.open_sec - now)
+                    log.warning("서킷 half-open 시험 호출 응답 없음, 슬롯 회수: %s", self.host)
+                    self._probes = 0
+                self._probes += 1
+                self._probe_at = now
+
+    def release_probe(self) -> None:
+        """
+        결과 없이 끝난 호출(취소, 인터럽트, 종료)의 half-open 시험 슬롯만 반납.
+        호출 측이 포기한 것이므로 성공/실패 어느 쪽으로도 기록하지 않음.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._results.clear()
+                log.info("서킷 closed (복구): %s", self.host)
+                return
+            self._append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trip()
+                return
+            self._append(False)
+            if self.state == CLOSED and self._should_trip():
+                self._trip()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._prune()
+            failures = sum(1 for _, ok in self._results if not ok)
+            return {
+                "state": self.state,
+                "calls": len(self._results),
+                "failures": failures,
+            }
+
+    def _append(self, ok: bool) -> None:
+        self._results.append((time.time(), ok))
+        self._prune()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.window_sec
+        while self._results and self._results[0][0] < cutoff:
+            self._results.popleft()
+
+    def _should_trip(self) -> bool:
+        if len(self._results) < self.min_calls:
+            return False
+        failures = sum(1 for _, ok in self._results if not ok)
+        return failures / len(self._results) >= self.failure_rate
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.time()
+        log.warning("서킷 open: %s (%ds 동안 호출 차단)", self.host, self.open_sec)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url_or_host: str) -> CircuitBreaker:
+    """URL(또는 호스트명)의 호스트 기준 브레이커. 프로세스 내 모든 잡이 공유."""
+    host = urlparse(url_or_host).netloc or url_or_host
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def breaker_status() -> dict:
+    """호스트별 브레이커 상태 (/health 등에 노출용)."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.host: b.snapshot() for b in breakers}
+
+
+# ── 백오프 & 재시도 예산 ─────────────────────────────────
+
+def next_backoff(prev: float, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """
+    Decorrelated jitter 백오프: min(cap, uniform(base, prev * 3)).
+    첫 호출은 prev=base로 시작.
+    """
+    return min(cap, random.uniform(base, max(base, prev) * 3))
+
+
+class RetryBudget:
+    """
+    잡 1회 실행 동안의 재시도 총량.
+    허용 재시도 수 = min_retries + ratio × 전체 요청 수.
+    의존 서비스가 죽었을 때 재시도가 요청량을 몇 배로 불리는 것을 막음.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """재시도 1회 사용. 예산이 없으면 False."""
+        with self._lock:
+            if self.retries >= self.min_retries + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+    def to_dict(self) -> dict:
+        return {"requests": self.requests, "retries": self.retries}
+
+
+# ── 재시도 래퍼 ──────────────────────────────────────────
+
+class RateLimited(Exception):
+    """
+    func가 던지는 "잠시 후 다시" 신호 (HTTP 429 등).
+    호스트는 살아 있으므로 브레이커엔 성공으로 기록하고, 시도 횟수와 별도로 최대 max_retries번 대기.
+    """
+
+    def __init__(self, retry_after: float | None = None, message: str = "Rate limited (429)"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After 헤더 (초 또는 HTTP 날짜) → 대기 초. 없거나 잘못된 값이면 None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_host_failure(error: Exception) -> bool:
+    """
+    기본 실패 분류: 브레이커에 호스트 장애로 기록할지.
+    HTTP 상태가 있는 예외(requests HTTPError, aiohttp ClientResponseError)는 5xx만 장애,
+    응답 파싱 오류(ValueError)는 장애 아님, 그 외(연결 실패, 타임아웃 등)는 장애.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status", None)
+    if isinstance(status, int):
+        return status >= 500
+    return not isinstance(error, ValueError)
+
+
+def call_with_retry(
+    url: str,
+    func: Callable[[], Any],
+    max_retries: int = 3,
+    budget: RetryBudget | None = None,
+    base: float = BACKOFF_BASE,
+    cap: float = BACKOFF_CAP,
+    is_failure: Callable[[Exception], bool] = is_host_failure,
+) -> Any:
+    """
+    func()를 호스트 브레이커 + jitter 백오프 + 재시도 예산으로 감싸 실행.
+
+    Args:
+        url: 브레이커 키로 쓸 URL (호스트 기준)
+        func: 인자 없는 호출. 실패 시 예외, rate limit이면 RateLimited를 던져야 함
+        max_retries: 최대 시도 횟수
+        budget: 잡 단위 재시도 예산 (None이면 무제한)
+        is_failure: 예외 → 호스트 장애 여부 (False면 재시도하되 브레이커엔 성공 기록)
+
+    Raises:
+        CircuitOpenError: 호스트 서킷이 열려 있음
+        RuntimeError: 재시도 횟수/예산 초과
+    """
+    state = _RetryState(url, max_retries, budget, base, cap, is_failure)
+    while True:
+        state.before_call()
+        try:
+            result = func()
+        except Exception as e:
+            time.sleep(state.on_error(e))
+        except BaseException:
+            state.on_cancel()
+            raise
+        else:
+            state.on_success()
+            return result
+
+
+async def call_with_retry_async(
+    url: str,
+    func: Callable[[], Awaitable[Any]],
+    max_retries: int = 3,
+    budget: RetryBudget | None = None,
+    base: float = BACKOFF_BASE,
+    cap: float = BACKOFF_CAP,
+    is_failure: Callable[[Exception], bool] = is_host_failure,
+) -> Any:
+    """call_with_retry의 async 버전. func는 코루틴을 반환하는 인자 없는 호출."""
+    state = _RetryState(url, max_retries, budget, base, cap, is_failure)
+    while True:
+        state.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            await asyncio.sleep(state.on_error(e))
+        except BaseException:
+            state.on_cancel()
+            raise
+        else:
+            state.on_success()
+            return result
+
+
+class _RetryState:
+    """call_with_retry / call_with_retry_async 공용 재시도 판단 (sleep만 호출 측에서)."""
+
+    def __init__(self, url, max_retries, budget, base, cap, is_failure):
+        self.url = url
+        self.breaker = get_breaker(url)
+        self.max_retries = max_retries
+        self.budget = budget
+        self.base = base
+        self.cap = cap
+        self.is_failure = is_failure
+        self.attempt = 0
+        self.rate_limited = 0
+        self.delay = base
+
+    def before_call(self) -> None:
+        self.breaker.before_call()
+        if self.budget is not None:
+            self.budget.record_request()
+        record_outbound()
+
+    def on_success(self) -> None:
+        self.breaker.record_success()
+
+    def on_cancel(self) -> None:
+        self.breaker.release_probe()  # 취소/인터럽트는 호스트 장애가 아님 — 시험 슬롯만 반납
+
+    def on_error(self, error: Exception) -> float:
+        """실패 기록 후 다음 시도까지 대기 초. 더 시도할 수 없으면 예외."""
+        if isinstance(error, RateLimited):
+            self.breaker.record_success()  # 호스트는 살아 있음
+            self.rate_limited += 1
+            if self.rate_limited > self.max_retries:
+                raise RuntimeError(f"Rate limit 대기 {self.max_retries}회 초과: {self.url}") from error
+            self._spend(error)
+            delay = self._rate_limit_delay(error.retry_after)
+            log.warning("Rate limited, %.1fs 대기 (%d/%d)", delay, self.rate_limited, self.max_retries)
+            return delay
+
+        if self.is_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self.attempt += 1
+        log.warning("요청 실패 (attempt %d/%d): %s", self.attempt, self.max_retries, error)
+        if self.attempt >= self.max_retries:
+            raise RuntimeError(f"요청 실패 ({self.max_retries}회 재시도 후): {self.url}") from error
+        self._spend(error)
+        self.delay = next_backoff(self.delay, self.base, self.cap)
+        return self.delay
+
+    def _rate_limit_delay(self, retry_after: float | None) -> float:
+        """Retry-After가 있으면 그 이상 + 최대 50% jitter (같은 시각에 몰려 재요청하지 않도록)."""
+        if retry_after is None:
+            self.delay = next_backoff(self.delay, self.base, self.cap)
+            return self.delay
+        return random.uniform(retry_after, retry_after * 1.5 + self.base)
+
+    def _spend(self, error: Exception) -> None:
+        if self.budget is not None and not self.budget.try_spend():
+            raise RetryBudgetExhausted(f"재시도 예산 소진: {self.url}") from error
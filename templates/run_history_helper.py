@@ -0,0 +1,406 @@
+"""
+잡 실행 이력 헬퍼 (지연 시간 백분위 + 성능 회귀 감지)
+잡 결과(processed, errors, elapsed_sec)를 응답 한 번으로 흘려보내지 않고
+실행마다 저장해서 라우트별 p50/p95와 "평소보다 느린 실행"을 확인할 때 사용.
+
+기록 항목:
+  route, started_at, duration_sec, status, processed, errors, rows_loaded, bytes_in,
+  outbound_calls, phases(단계별 초, JSON), baseline_sec, slow
+
+저장소 (RUN_HISTORY_BACKEND 환경 변수, scripts/deploy.sh에서 설정):
+  - sqlite (로컬 기본): 로컬 파일 (RUN_HISTORY_PATH, 기본 /tmp/run_history.db) — 로컬/테스트용
+    Cloud Run에서는 인스턴스별 + 재시작 시 사라지므로 운영에 쓰지 말 것
+  - bigquery (Cloud Run 기본): RUN_HISTORY_DATASET.RUN_HISTORY_TABLE에 적재 — 운영용
+    테이블은 자동 생성, 데이터셋(기본 batch_ops)은 미리 생성
+
+사용 예시:
+  # batch_endpoint.py — 라우트에 @track_run 데코레이터 (실행 1회 = 레코드 1개)
+
+  # 잡 코드 — 단계별 시간, 외부 호출 기록 (실행 중이 아니면 no-op)
+  from run_history_helper import run_phase, record_outbound
+  with run_phase("fetch"):
+      data = fetch_with_retry(url)   # fetch_with_retry는 호출/바이트를 자동 기록
+  with run_phase("load"):
+      upsert(...)
+
+  # 조회
+  from run_history_helper import get_store, summarize
+  summarize(get_store().recent(limit=500))
+  # → {"/run-my-job": {"runs": 48, "p50_sec": 12.1, "p95_sec": 30.4, "slow_runs": [...]}}
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+# ── 설정 ─────────────────────────────────────────────────
+
+BASELINE_RUNS = int(os.getenv("RUN_BASELINE_RUNS", "20"))          # 기준선에 쓸 직전 실행 수
+BASELINE_MIN_RUNS = int(os.getenv("RUN_BASELINE_MIN_RUNS", "5"))   # 기준선 판단 최소 실행 수
+REGRESSION_FACTOR = float(os.getenv("RUN_REGRESSION_FACTOR", "1.5"))  # 기준선 × 배수 초과 시 slow
+
+COLUMNS = [
+    ("run_id", "STRING"),
+    ("route", "STRING"),
+    ("started_at", "TIMESTAMP"),
+    ("duration_sec", "FLOAT64"),
+    ("status", "STRING"),
+    ("processed", "INT64"),
+    ("errors", "INT64"),
+    ("rows_loaded", "INT64"),
+    ("bytes_in", "INT64"),
+    ("outbound_calls", "INT64"),
+    ("phases", "STRING"),
+    ("baseline_sec", "FLOAT64"),
+    ("slow", "BOOL"),
+]
+
+
+# ── 실행 중 지표 수집 ────────────────────────────────────
+
+class RunMetrics:
+    """실행 1회 동안 쌓는 지표. 잡 내부 스레드에서 함께 갱신하므로 스레드 안전."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.run_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.outbound_calls = 0
+        self.bytes_in = 0
+        self.phases: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_outbound(self, nbytes: int = 0, calls: int = 1) -> None:
+        with self._lock:
+            self.outbound_calls += calls
+            self.bytes_in += nbytes
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = round(self.phases.get(name, 0.0) + seconds, 3)
+
+
+_current: contextvars.ContextVar[RunMetrics | None] = contextvars.ContextVar(
+    "current_run", default=None
+)
+
+
+def current_run() -> RunMetrics | None:
+    """현재 요청의 실행 지표. @track_run 밖이면 None."""
+    return _current.get()
+
+
+def start_run(route: str) -> tuple[RunMetrics, contextvars.Token]:
+    metrics = RunMetrics(route)
+    return metrics, _current.set(metrics)
+
+
+def end_run(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def record_outbound(nbytes: int = 0, calls: int = 1) -> None:
+    """외부 호출 기록 (실행 중이 아니면 무시). 응답 바이트만 더할 때는 calls=0."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_outbound(nbytes, calls)
+
+
+@contextmanager
+def run_phase(name: str):
+    """단계별 시간 측정. 같은 이름은 누적."""
+    t0 = time.time()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add_phase(name, time.time() - t0)
+
+
+def build_record(metrics: RunMetrics, status: str, result: dict | None) -> dict:
+    """실행 지표 + 잡 결과 → 저장용 레코드."""
+    result = result or {}
+    phases = dict(metrics.phases)
+    # pipeline_helper 결과가 있으면 스테이지별 busy_sec도 단계로 기록
+    for stage, stats in (result.get("stages") or {}).items():
+        phases.setdefault(stage, stats.get("busy_sec", 0.0))
+
+    return {
+        "run_id": metrics.run_id,
+        "route": metrics.route,
+        "started_at": metrics.started_at,
+        "duration_sec": round(time.time() - metrics.started_at, 3),
+        "status": status,
+        "processed": _as_int(result.get("processed")),
+        "errors": _as_int(result.get("errors")),
+        "rows_loaded": _as_int(result.get("rows_loaded", result.get("processed"))),
+        "bytes_in": metrics.bytes_in,
+        "outbound_calls": metrics.outbound_calls,
+        "phases": phases,
+    }
+
+
+def save_run(record: dict, store=None) -> dict:
+    """
+    직전 실행 기준선과 비교해 slow 여부를 붙이고 저장.
+    기준선 조회 실패는 기준선 없이 저장하고, 저장소 생성/저장 실패는 로그만 남김
+    (이력 때문에 잡 응답이 실패하지 않도록).
+    """
+    try:
+        store = store or get_store()
+    except Exception as e:
+        log.error("실행 이력 저장소 생성 실패 (%s): %s", record.get("route"), e)
+        return record
+
+    baseline = None
+    try:
+        previous = store.recent(route=record["route"], limit=BASELINE_RUNS)
+        baseline = _baseline([r["duration_sec"] for r in previous if r["status"] == "success"])
+    except Exception as e:
+        log.warning("실행 이력 기준선 조회 실패 (%s): %s", record.get("route"), e)
+
+    record["baseline_sec"] = baseline
+    record["slow"] = _is_slow(record["duration_sec"], baseline)
+    if record["slow"]:
+        log.warning(
+            "느린 실행 감지: %s %.1fs (기준선 %.1fs × %.1f 초과)",
+            record["route"], record["duration_sec"], baseline, REGRESSION_FACTOR,
+        )
+
+    try:
+        store.record(record)
+    except Exception as e:
+        log.error("실행 이력 저장 실패 (%s): %s", record.get("route"), e)
+    return record
+
+
+# ── 저장소 ───────────────────────────────────────────────
+
+class SqliteRunStore:
+    """로컬 SQLite 저장소 (로컬 실행/테스트용)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            cols = ", ".join(f"{name} {_SQLITE_TYPES[bq_type]}" for name, bq_type in COLUMNS)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS runs ({cols}, PRIMARY KEY (run_id))")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_route_started ON runs (route, started_at)")
+
+    def record(self, run: dict) -> None:
+        row = _to_row(run)
+        names = [name for name, _ in COLUMNS]
+        sql = f"INSERT OR REPLACE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        with self._lock, self._connect() as conn:
+            conn.execute(sql, [row[n] for n in names])
+
+    def recent(self, route: str | None = None, limit: int = 500) -> list[dict]:
+        """최근 실행 (최신순)."""
+        sql = "SELECT * FROM runs"
+        params: list = []
+        if route:
+            sql += " WHERE route = ?"
+            params.append(route)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock, self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [_from_row(dict(r)) for r in conn.execute(sql, params)]
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:  # 정상 종료 시 commit, 예외 시 rollback
+                yield conn
+        finally:
+            conn.close()
+
+
+class BigQueryRunStore:
+    """BigQuery 저장소 (운영용). 테이블은 첫 조회/기록 시 자동 생성 (데이터셋은 미리 있어야 함)."""
+
+    def __init__(self, project: str, dataset: str, table: str):
+        self.project = project
+        self.dataset = dataset
+        self.table = table
+        self._ensured = False
+
+    def record(self, run: dict) -> None:
+        from bigquery_helper import simple_insert
+
+        self._ensure_table()
+        row = _to_row(run)
+        row["started_at"] = datetime.fromtimestamp(row["started_at"], timezone.utc).isoformat()
+        result = simple_insert(self.project, self.dataset, self.table, [row])
+        if result["errors"]:
+            raise RuntimeError(f"실행 이력 insert 실패: {result['errors'][:1]}")
+
+    def recent(self, route: str | None = None, limit: int = 500) -> list[dict]:
+        from bigquery_helper import run_query
+
+        self._ensure_table()
+        where = "WHERE route = @route" if route else ""
+        params = {"limit": limit, **({"route": route} if route else {})}
+        sql = f"""
+        SELECT * FROM `{self.project}.{self.dataset}.{self.table}`
+        {where}
+        ORDER BY started_at DESC
+        LIMIT @limit
+        """
+        rows = run_query(self.project, sql, params)
+        for r in rows:
+            if isinstance(r.get("started_at"), datetime):
+                r["started_at"] = r["started_at"].timestamp()
+        return [_from_row(r) for r in rows]
+
+    def _ensure_table(self) -> None:
+        if self._ensured:
+            return
+        from bigquery_helper import ensure_table
+
+        ensure_table(self.project, self.dataset, self.table, [
+            {"name": name, "type": bq_type} for name, bq_type in COLUMNS
+        ])
+        self._ensured = True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    환경 변수 설정에 맞는 프로세스 공용 저장소.
+    RUN_HISTORY_BACKEND 미지정 시 Cloud Run(K_SERVICE 있음)이면 bigquery, 로컬이면 sqlite.
+    """
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            default = "bigquery" if os.getenv("K_SERVICE") else "sqlite"
+            backend = os.getenv("RUN_HISTORY_BACKEND", default).lower()
+            if backend == "bigquery":
+                _store = BigQueryRunStore(
+                    project=os.environ["GOOGLE_CLOUD_PROJECT"],
+                    dataset=os.getenv("RUN_HISTORY_DATASET", "batch_ops"),
+                    table=os.getenv("RUN_HISTORY_TABLE", "job_runs"),
+                )
+            else:
+                _store = SqliteRunStore(os.getenv("RUN_HISTORY_PATH", "/tmp/run_history.db"))
+            log.info("실행 이력 저장소: %s", type(_store).__name__)
+        return _store
+
+
+# ── 집계 ─────────────────────────────────────────────────
+
+def summarize(runs: list[dict]) -> dict:
+    """
+    라우트별 p50/p95와 기준선 대비 느린 실행 목록.
+    기준선 = 같은 라우트의 직전 BASELINE_RUNS개 성공 실행 duration 중앙값.
+    """
+    by_route: dict[str, list[dict]] = {}
+    for run in runs:
+        by_route.setdefault(run["route"], []).append(run)
+
+    summary = {}
+    for route, route_runs in by_route.items():
+        route_runs.sort(key=lambda r: r["started_at"])
+        durations = [r["duration_sec"] for r in route_runs if r["status"] == "success"]
+
+        slow_runs = []
+        history: list[float] = []
+        for run in route_runs:
+            baseline = _baseline(history[-BASELINE_RUNS:])
+            if _is_slow(run["duration_sec"], baseline):
+                slow_runs.append({
+                    "run_id": run["run_id"],
+                    "started_at": datetime.fromtimestamp(run["started_at"], timezone.utc).isoformat(),
+                    "duration_sec": run["duration_sec"],
+                    "baseline_sec": baseline,
+                })
+            if run["status"] == "success":
+                history.append(run["duration_sec"])
+
+        last = route_runs[-1]
+        summary[route] = {
+            "runs": len(route_runs),
+            "errors": sum(1 for r in route_runs if r["status"] != "success"),
+            "p50_sec": _percentile(durations, 50),
+            "p95_sec": _percentile(durations, 95),
+            "baseline_sec": _baseline(history[-BASELINE_RUNS:]),
+            "last": {
+                "run_id": last["run_id"],
+                "duration_sec": last["duration_sec"],
+                "status": last["status"],
+                "processed": last["processed"],
+            },
+            "slow_runs": slow_runs,
+        }
+    return summary
+
+
+# ── 내부 헬퍼 ────────────────────────────────────────────
+
+_SQLITE_TYPES = {
+    "STRING": "TEXT",
+    "TIMESTAMP": "REAL",
+    "FLOAT64": "REAL",
+    "INT64": "INTEGER",
+    "BOOL": "INTEGER",
+}
+
+
+def _to_row(run: dict) -> dict:
+    row = {name: run.get(name) for name, _ in COLUMNS}
+    row["phases"] = json.dumps(run.get("phases") or {})
+    return row
+
+
+def _from_row(row: dict) -> dict:
+    if isinstance(row.get("phases"), str):
+        row["phases"] = json.loads(row["phases"] or "{}")
+    if row.get("slow") is not None:
+        row["slow"] = bool(row["slow"])
+    return row
+
+
+def _as_int(value) -> int:
+    """잡 결과의 건수 값 → int (숫자가 아니면 0)."""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _baseline(durations: list[float]) -> float | None:
+    if len(durations) < BASELINE_MIN_RUNS:
+        return None
+    return round(statistics.median(durations), 3)
+
+
+def _is_slow(duration: float, baseline: float | None) -> bool:
+    return baseline is not None and duration > baseline * REGRESSION_FACTOR
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    """선형 보간 백분위."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return round(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo), 3)
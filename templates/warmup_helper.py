@@ -0,0 +1,336 @@
+"""
+콜드 스타트 단축 헬퍼 (warm-up + import 시간 리포트)
+scale-from-zero 후 첫 Scheduler 요청이 모듈 import, 인증 정보 탐색, 클라이언트 생성
+비용을 요청 데드라인 안에서 치르지 않도록, 트래픽을 받기 전에 미리 로드.
+
+구성:
+  - register_module / register_client: warm-up 대상 등록
+  - warm_up(): 등록된 모듈 import + 클라이언트 생성 (1번만 실행, 모듈/클라이언트별 ms 기록)
+  - record_startup_step(): warm-up 밖의 시작 단계 시간 기록 (예: 프로세스 풀 생성)
+  - startup_report(): 시작 시간 리포트 (batch_endpoint.py의 GET /startup)
+
+사용 예시 (batch_endpoint.py):
+  from warmup_helper import register_module, register_client, warm_up
+
+  register_module("google.cloud.bigquery")
+  register_module("scripts.batch.my_job")
+  register_client("bigquery", lambda: bigquery_helper.get_client(PROJECT))  # 생성된 클라이언트는 bigquery_helper가 캐시
+  warm_up()   # 모듈 import 시점 = gunicorn 워커가 요청을 받기 전
+
+  gunicorn은 워커가 앱을 import하기 전에 포트를 열므로, Cloud Run startup probe를
+  GET /health로 지정해야 warm-up이 끝난 뒤 트래픽을 받음 (scripts/deploy.sh).
+
+콜드 스타트 벤치마크 (새 프로세스에서 반복 측정):
+  python warmup_helper.py --module batch_endpoint --runs 5
+  → 앱 import + warm-up 시간, 모듈별 단독 import 시간, 그리고
+    WARMUP_ON_START=true/false 각각의 "준비 완료까지" / "첫 요청" 시간 비교
+
+modules_ms는 등록 순서대로 import하며 잰 값이라, 공유 의존성은 먼저 import한 모듈에
+전부 합산됨 (뒤 모듈은 0에 가깝게 보임). 모듈별 실제 비용은 벤치마크의 isolated_modules_ms 참고.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+log = logging.getLogger(__name__)
+
+# ── 설정 ─────────────────────────────────────────────────
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "300"))     # 모듈/클라이언트 1개당 예산
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "5000"))  # 앱 전체 시작 예산
+
+_modules: list[str] = []
+_client_factories: dict[str, Callable[[], Any]] = {}
+_report: dict | None = None
+_steps: dict[str, float] = {}
+_lock = threading.Lock()
+_process_started = time.time()
+
+
+# ── 등록 ─────────────────────────────────────────────────
+
+def register_module(name: str) -> None:
+    """warm-up 때 import할 모듈 등록 (예: "google.cloud.bigquery")."""
+    if name not in _modules:
+        _modules.append(name)
+
+
+def register_client(name: str, factory: Callable[[], Any]) -> None:
+    """
+    warm-up 때 생성할 클라이언트 등록. factory는 인자 없는 생성 함수로,
+    만든 클라이언트를 스스로 캐시해야 함 (예: bigquery_helper.get_client).
+    """
+    _client_factories[name] = factory
+
+
+def mark_process_start(ts: float) -> None:
+    """앱 진입점의 시작 시각 지정 (기본값은 이 모듈 import 시각). 더 이른 시각만 반영."""
+    global _process_started
+    _process_started = min(_process_started, ts)
+
+
+def record_startup_step(name: str, ms: float) -> None:
+    """warm-up 밖에서 실행된 시작 단계 시간 기록 (startup_report의 steps_ms)."""
+    _steps[name] = round(ms, 1)
+    log.info("시작 단계 완료: %s %.0fms", name, ms)
+
+
+# ── warm-up ──────────────────────────────────────────────
+
+def warm_up() -> dict:
+    """
+    등록된 모듈 import + 클라이언트 생성. 이미 실행됐으면 기존 리포트 반환.
+    실패한 항목은 리포트의 failed에 기록하고 나머지는 계속 진행 (시작을 막지 않음).
+    """
+    global _report
+
+    with _lock:
+        if _report is not None:
+            return _report
+
+        start = time.time()
+        modules: dict[str, float] = {}
+        clients: dict[str, float] = {}
+        failed: dict[str, str] = {}
+
+        for name in _modules:
+            t0 = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                failed[name] = str(e)
+                log.warning("warm-up import 실패: %s (%s)", name, e)
+                continue
+            modules[name] = _ms_since(t0)
+
+        for name, factory in _client_factories.items():
+            t0 = time.perf_counter()
+            try:
+                factory()
+            except Exception as e:
+                failed[name] = str(e)
+                log.warning("warm-up 클라이언트 생성 실패: %s (%s)", name, e)
+                continue
+            clients[name] = _ms_since(t0)
+
+        finished = time.time()
+        _report = {
+            "warm": True,
+            "warmed_at": finished,
+            "warmup_ms": round((finished - start) * 1000, 1),
+            "startup_ms": round((finished - _process_started) * 1000, 1),
+            "modules_ms": modules,
+            "modules_ms_note": "등록 순서대로 측정 — 공유 의존성은 먼저 import한 모듈에 합산됨",
+            "clients_ms": clients,
+            "failed": failed,
+            "over_budget": sorted(
+                name for name, ms in {**modules, **clients}.items() if ms > IMPORT_BUDGET_MS
+            ),
+            "budget_ms": {"per_item": IMPORT_BUDGET_MS, "startup": STARTUP_BUDGET_MS},
+        }
+        log.info(
+            "warm-up 완료: %.0fms (시작부터 %.0fms), 모듈 %d개, 클라이언트 %d개, 실패 %d개",
+            _report["warmup_ms"], _report["startup_ms"], len(modules), len(clients), len(failed),
+        )
+        if _report["startup_ms"] > STARTUP_BUDGET_MS:
+            log.warning("시작 시간 예산 초과: %.0fms > %.0fms", _report["startup_ms"], STARTUP_BUDGET_MS)
+        return _report
+
+
+def is_warm() -> bool:
+    return _report is not None
+
+
+def startup_report() -> dict:
+    """시작 시간 리포트. warm-up 전이면 등록 목록과 기록된 시작 단계만 반환."""
+    if _report is not None:
+        return {**_report, "steps_ms": dict(_steps)}
+    return {
+        "warm": False,
+        "steps_ms": dict(_steps),
+        "registered_modules": list(_modules),
+        "registered_clients": list(_client_factories),
+    }
+
+
+def _ms_since(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+# ── 콜드 스타트 벤치마크 ─────────────────────────────────
+
+_BENCH_CODE = """
+import json, sys, time
+t0 = time.time()
+import warmup_helper
+warmup_helper.mark_process_start(t0)
+import {module}
+report = warmup_helper.warm_up()
+report["import_app_ms"] = round((time.time() - t0) * 1000, 1)
+report["steps_ms"] = warmup_helper.startup_report()["steps_ms"]
+print("__REPORT__" + json.dumps(report))
+"""
+
+_ISOLATED_CODE = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+print("__REPORT__" + json.dumps({{"ms": round((time.perf_counter() - t0) * 1000, 1)}}))
+"""
+
+_FIRST_REQUEST_CODE = """
+import json, time
+t0 = time.time()
+import warmup_helper
+warmup_helper.mark_process_start(t0)
+import {module} as app_module
+ready_ms = round((time.time() - t0) * 1000, 1)
+client = app_module.app.test_client()
+t1 = time.perf_counter()
+status = client.open({path!r}, method={method!r}).status_code
+first_ms = round((time.perf_counter() - t1) * 1000, 1)
+print("__REPORT__" + json.dumps({{"ready_ms": ready_ms, "first_request_ms": first_ms, "status": status}}))
+"""
+
+
+def run_cold_start_benchmark(module: str, runs: int = 5, top: int = 10) -> dict:
+    """
+    새 Python 프로세스에서 module import + warm-up을 runs번 반복 측정.
+    프로세스 풀 생성처럼 import 중에 실행되는 시작 단계도 그대로 포함 (steps_ms).
+    추가로 등록 모듈을 각각 새 프로세스에서 단독 import해 순서와 무관한 비용을 재고,
+    -X importtime을 1번 더 실행해 자체(self) import 시간 상위 top개 모듈도 보고.
+    """
+    walls, startups, warmups = [], [], []
+    steps: dict[str, list[float]] = {}
+    report = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        report, _ = _bench_once(_BENCH_CODE.format(module=module))
+        walls.append(_ms_since(t0))
+        startups.append(report["import_app_ms"])
+        warmups.append(report["warmup_ms"])
+        for name, ms in report["steps_ms"].items():
+            steps.setdefault(name, []).append(ms)
+
+    isolated = {}
+    for name in report["modules_ms"]:
+        times = [_bench_once(_ISOLATED_CODE.format(module=name))[0]["ms"] for _ in range(runs)]
+        isolated[name] = _summary(times)["median"]
+
+    # importtime 실행에서는 프로세스 풀을 끔: 워커도 -X importtime을 물려받아 출력이 섞이고,
+    # 풀 생성 대기가 앱 모듈의 self 시간으로 잡힘 (풀 시간은 위 steps_ms에 이미 포함)
+    _, stderr = _bench_once(
+        _BENCH_CODE.format(module=module), importtime=True, env={"PROCESS_POOL_WORKERS": "0"},
+    )
+
+    return {
+        "module": module,
+        "runs": runs,
+        "process_wall_ms": _summary(walls),     # 인터프리터 기동 포함
+        "startup_ms": _summary(startups),       # 앱 import (프로세스 풀 포함) + warm-up
+        "warmup_ms": _summary(warmups),
+        "steps_ms": {name: _summary(v) for name, v in steps.items()},
+        "modules_ms": report["modules_ms"],     # 등록 순서 의존 (공유 의존성은 앞 모듈에 합산)
+        "isolated_modules_ms": isolated,        # 모듈별 단독 import (중앙값)
+        "clients_ms": report["clients_ms"],
+        "failed": report["failed"],
+        "slowest_imports_ms": _parse_importtime(stderr, top),
+    }
+
+
+def run_first_request_benchmark(
+    module: str, path: str = "/health", method: str = "GET", runs: int = 5,
+) -> dict:
+    """
+    WARMUP_ON_START=true/false 각각 새 프로세스에서 "앱 준비 완료까지" 시간과
+    첫 요청(path) 처리 시간을 runs번 측정. module은 Flask app 객체를 노출해야 함.
+    /health는 warm-up 전이면 warm-up을 직접 실행하므로, false 쪽 첫 요청 시간이
+    트래픽이 치르게 되는 warm-up 비용.
+    """
+    result = {"module": module, "path": path, "runs": runs}
+    for setting in ("true", "false"):
+        ready, first, statuses = [], [], set()
+        for _ in range(runs):
+            report, _ = _bench_once(
+                _FIRST_REQUEST_CODE.format(module=module, path=path, method=method),
+                env={"WARMUP_ON_START": setting},
+            )
+            ready.append(report["ready_ms"])
+            first.append(report["first_request_ms"])
+            statuses.add(report["status"])
+        result[f"warmup_on_start_{setting}"] = {
+            "ready_ms": _summary(ready),
+            "first_request_ms": _summary(first),
+            "status": sorted(statuses),
+        }
+    return result
+
+
+def _summary(values: list[float]) -> dict:
+    import statistics
+
+    return {
+        "min": min(values),
+        "median": round(statistics.median(values), 1),
+        "max": max(values),
+    }
+
+
+def _bench_once(code: str, importtime: bool = False, env: dict | None = None) -> tuple[dict, str]:
+    import json
+    import subprocess
+    import sys
+
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(args, capture_output=True, text=True, env={**os.environ, **(env or {})})
+
+    line = next((l for l in proc.stdout.splitlines() if l.startswith("__REPORT__")), None)
+    if proc.returncode != 0 or line is None:
+        raise RuntimeError(f"벤치마크 실행 실패:\n{proc.stderr[-2000:]}")
+    return json.loads(line[len("__REPORT__"):]), proc.stderr
+
+
+def _parse_importtime(stderr: str, top: int) -> list:
+    """
+    -X importtime 출력에서 자체(self) import 시간(ms) 상위 top개.
+    누적 시간은 하위 import를 중복으로 세고 순서에 따라 달라지므로 self 기준으로 정렬.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        entries.append((name.strip(), round(int(self_us) / 1000, 1), round(int(cumulative) / 1000, 1)))
+    entries.sort(key=lambda e: e[1], reverse=True)
+    return [{"module": n, "self_ms": ms, "cumulative_ms": cum} for n, ms, cum in entries[:top]]
+
+
+# ── CLI 직접 실행 (로컬 테스트용) ───────────────────────
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="콜드 스타트 벤치마크")
+    parser.add_argument("--module", default="batch_endpoint", help="측정할 앱 모듈")
+    parser.add_argument("--runs", type=int, default=5, help="반복 횟수")
+    parser.add_argument("--top", type=int, default=10, help="느린 import 상위 N개")
+    parser.add_argument("--path", default="/health", help="첫 요청 측정 경로")
+    parser.add_argument("--method", default="GET", help="첫 요청 HTTP 메서드")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    result = run_cold_start_benchmark(args.module, runs=args.runs, top=args.top)
+    result["first_request"] = run_first_request_benchmark(
+        args.module, path=args.path, method=args.method, runs=args.runs,
+    )
+    print(f"\n결과: {json.dumps(result, ensure_ascii=False, indent=2)}")